@@ -1,8 +1,11 @@
+import os
 from textual.app import App
 from app.screens.login import LoginScreen
 from app.screens.home import HomeScreen
 from app.screens.builder import BuilderScreen
 from app.screens.diagram import DiagramScreen
+from core.snapshot import bootstrap
+from core.db import enable_memory_catalog
 
 class SpinodeApp(App):
     CSS = """
@@ -19,4 +22,9 @@ class SpinodeApp(App):
         self.push_screen("login")
 
 if __name__ == "__main__":
+    # katalog boşsa spinode.snap / $SPINODE_SNAPSHOT'tan doldur (cobra gerekmez)
+    bootstrap()
+    # opt-in: katalog tablolarını belleğe kopyala (okumalar diskten değil RAM'den)
+    if os.environ.get("SPINODE_MEMORY_CATALOG") == "1":
+        enable_memory_catalog()
     SpinodeApp().run()
\ No newline at end of file
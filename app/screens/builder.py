@@ -1,14 +1,19 @@
 # app/screens/builder.py
 import re
+from textual import work
 from textual.screen import Screen
+from textual.worker import get_current_worker
 from textual.app import ComposeResult
 from textual.widgets import Header, Footer, Static, Input, Select, Button, TextArea, Checkbox, ListView, ListItem  # templates için
-from core.meta_derived import derive_pipeline_options, derive_templates, get_prop_info
+from core.meta_derived import get_class_meta, get_pipeline_options, get_templates, get_prop_info
 from textual.containers import Vertical, Horizontal
-from core.db import get_conn
 from core.moquery import Condition, render_moquery
-from core.diagram import to_mermaid, to_ascii
 from core.audit import log_query_run
+from core.planner import render_planned
+from core.predicates import preview_matches
+
+DIAGRAM_DEPTH = 2  # Mermaid/ASCII: kaç seviye alt ağaç çizilsin
+MATCH_PREVIEW = 50  # son yakalamadan gösterilen eşleşme sayısı
 
 OPS = [("exact","exact"),("contains","contains"),("regex","regex"),("startswith","startswith"),("in","in")]
 
@@ -28,10 +33,11 @@ class BuilderScreen(Screen):
     #left  { width: 46%; border: round $primary; }
     #right { width: 1fr;  border: round $secondary; }
     #props, #templates, #examples { margin-top: 1; height: 1fr; }
-    #conds, #mq { border: round $secondary; background: $panel; }
+    #conds, #mq, #subqueries, #matches { border: round $secondary; background: $panel; }
     #pipeline { margin-top: 1; }
     #buttons { content-align: right middle; }
-    #class_title { margin-bottom: 1; }
+    #class_title { margin-bottom: 0; }
+    #dn_template { margin-bottom: 1; color: $secondary; }
     """
 
     # ---- lifecycle
@@ -41,6 +47,7 @@ class BuilderScreen(Screen):
             # LEFT: CLASS & PROPS
             with Vertical(id="left"):
                 yield Static("", id="class_title")
+                yield Static("", id="dn_template", markup=False)  # rn'lerde [..] olabilir
                 with Horizontal():
                     yield Select([], prompt="Prop", id="prop")
                     yield Select(OPS, prompt="Op", id="op")
@@ -71,6 +78,13 @@ class BuilderScreen(Screen):
                 yield Static("Preview (final command):", id="mq_title")
                 yield TextArea("", id="mq", read_only=True)
 
+                # büyük filtrelerin bölündüğü alt sorgular (yalnızca bölünme varsa görünür)
+                yield Static("", id="subqueries_title")
+                yield TextArea("", id="subqueries", read_only=True)
+
+                yield Static("Son yakalamada eşleşenler:", id="matches_title")
+                yield TextArea("", id="matches", read_only=True)
+
                 with Horizontal(id="buttons"):
                     yield Button("Mermaid", id="mm")
                     yield Button("ASCII", id="ascii")
@@ -80,6 +94,7 @@ class BuilderScreen(Screen):
     def on_show(self) -> None:
         """Her girişte — state sıfırla, seçili class'a göre prop'ları doldur."""
         self.conds: list[Condition] = []
+        self._plan_error: str | None = None  # son bildirilen bölme hatası
 
         cls = getattr(self.app, "selected_class", None)
         if not cls:
@@ -88,27 +103,10 @@ class BuilderScreen(Screen):
             return
         self.cls = cls or "-"
         self.query_one("#class_title", Static).update(f"[b]Class: {self.cls}[/b]")
+        meta = get_class_meta(self.cls)
+        self.query_one("#dn_template", Static).update(f"DN: {meta.dn_template}" if meta and meta.dn_template else "DN: -")
 
-        # props doldur
-        conn = get_conn(); cur = conn.cursor()
-        cur.execute("""
-            SELECT p.name, p.is_naming FROM props p
-            JOIN classes c ON c.id = p.class_id
-            WHERE c.name = ?
-            ORDER BY p.is_naming DESC, p.name
-        """, (self.cls,))
-        props = cur.fetchall()
-        conn.close()
-        if not props:
-            props = [("name",1),("nameAlias",0),("dn",0),("epgDn",0)]
-
-        self.query_one("#prop", Select).set_options([(p[0], p[0]) for p in props])
-        self.query_one("#props", TextArea).load_text(
-            "\n".join([f"• {p[0]}{' (naming)' if p[1] else ''}" for p in props])
-        )
-
-
-        # props listesi (dinamik)
+        # props (ClassMeta önbelleğinden; aynı sınıfın sonraki açılışları DB'ye gitmez)
         prop_rows = get_prop_info(self.cls)
         if not prop_rows:
             prop_rows = [{"name":"name","is_naming":1},{"name":"nameAlias","is_naming":0},{"name":"dn","is_naming":0}]
@@ -132,7 +130,7 @@ class BuilderScreen(Screen):
         def _safe_id(logical_id: str) -> str:
             # yalnızca [A-Za-z0-9_-] izinli; diğerlerini '_' yap
             return "pipe_" + re.sub(r"[^A-Za-z0-9_-]", "_", logical_id)
-        for opt in derive_pipeline_options(self.cls):
+        for opt in get_pipeline_options(self.cls):
             logical_id = opt["id"]          # örn: grep:^dn, sortu, uniq
             wid = _safe_id(logical_id)      # örn: pipe_grep__dn, pipe_sortu
             cb = Checkbox(opt["label"], id=wid)
@@ -141,7 +139,7 @@ class BuilderScreen(Screen):
         # TEMPLATES — dinamik
         tlist = self.query_one("#templates", ListView)
         tlist.clear()
-        self._templates = derive_templates(self.cls)
+        self._templates = get_templates(self.cls)
         for i, tpl in enumerate(self._templates):
             tlist.append(ListItem(Static(f"• {tpl['title']}"), id=f"tpl_{i}"))
 
@@ -169,10 +167,12 @@ class BuilderScreen(Screen):
         except Exception:
             self.app.notify("Kopyalama desteklenmiyor", severity="warning")
 
-    def action_diagram(self):
-        mer = to_mermaid(self.cls)
-        self.app.diagram_title = f"Mermaid for {self.cls}"
-        self.app.diagram_content = mer
+    def action_diagram(self, fmt: str = "mermaid"):
+        # çizim DiagramScreen'de tembel yapılır (ağaç + önbellekli metin)
+        self.app.diagram_title = f"{'Mermaid' if fmt == 'mermaid' else 'ASCII'} for {self.cls}"
+        self.app.diagram_root = self.cls
+        self.app.diagram_depth = DIAGRAM_DEPTH
+        self.app.diagram_format = fmt
         self.app.push_screen("diagram")
     # ---- events
     def on_button_pressed(self, ev: Button.Pressed) -> None:
@@ -184,10 +184,7 @@ class BuilderScreen(Screen):
         elif ev.button.id == "mm":
             self.action_diagram()
         elif ev.button.id == "ascii":
-            asc = to_ascii(self.cls)
-            self.app.diagram_title = f"ASCII for {self.cls}"
-            self.app.diagram_content = f"```\n{asc}\n```"
-            self.app.push_screen("diagram")
+            self.action_diagram("ascii")
         elif ev.button.id == "save":
             self.action_save()
 
@@ -252,10 +249,47 @@ class BuilderScreen(Screen):
                 uniq = True
 
         greps_cli = [f'"{g}"' for g in greps] if greps else None
+        # #mq tek komut kalır (kopyala / kaydet / log onu kullanır)
         mq = render_moquery(self.cls, self.conds, greps=greps_cli, sort_unique=sortu, uniq=uniq)
+        try:
+            # büyük 'in' / alternasyonlar boyut sınırlı alt komutlara bölünür
+            subs = render_planned(self.cls, self.conds, greps=greps_cli, sort_unique=sortu, uniq=uniq)
+            self._plan_error = None
+        except ValueError as e:
+            subs = []
+            # her yenilemede değil, hata değiştiğinde bir kez uyar
+            if str(e) != self._plan_error:
+                self._plan_error = str(e)
+                self.app.notify(str(e), severity="warning")
         lines = [f"{c.prop} {c.op} {c.value}" for c in self.conds] or ["(koşul yok)"]
         self.query_one("#conds", TextArea).load_text("\n".join(lines))
         self.query_one("#mq", TextArea).load_text(mq)
+        split = len(subs) > 1
+        title = self.query_one("#subqueries_title", Static)
+        area = self.query_one("#subqueries", TextArea)
+        title.display = area.display = split
+        if split:
+            title.update(f"Alt sorgular ({len(subs)}; APIC'te paralel çalıştırılır):")
+            area.load_text("\n".join(subs))
+        self._preview_matches(self.cls, list(self.conds))
+
+    @work(thread=True, exclusive=True, group="matches")
+    def _preview_matches(self, cls: str, conds: list) -> None:
+        # yakalanmış MO'lar üzerinde yerel değerlendirme (fabric'e gitmeden)
+        worker = get_current_worker()
+        try:
+            res = preview_matches(cls, conds, limit=MATCH_PREVIEW, cancelled=lambda: worker.is_cancelled)
+        except ValueError as e:
+            text = f"(hata: {e})"
+        else:
+            if res is None:
+                text = "(bu sınıf için yakalama yok — scripts/load_capture.py)"
+            else:
+                more = res["total"] - len(res["dns"])
+                text = "\n".join([f"{res['total']} eşleşme (yakalama #{res['capture_id']})", *res["dns"]]
+                                 + ([f"… {more} daha"] if more > 0 else []))
+        if not worker.is_cancelled:
+            self.app.call_from_thread(self.query_one("#matches", TextArea).load_text, text)
 
     def on_list_view_selected(self, event: ListView.Selected) -> None:
         if not str(event.list_view.id) == "templates":
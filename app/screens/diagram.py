@@ -1,23 +1,139 @@
+from rich.text import Text
+from textual import work
 from textual.screen import Screen
 from textual.app import ComposeResult
-from textual.widgets import Header, Footer, Static, TextArea
+from textual.widgets import Header, Footer, Static, TextArea, Tree
+from textual.widgets.tree import TreeNode
+
+from core.diagram import MAX_NODES, expand, render
+from core.graph import get_graph
+
+TREE_PAGE = 200  # bir düğümün çocukları bu kadarlık sayfalarla eklenir
+
 
 class DiagramScreen(Screen):
-    BINDINGS = [("q", "app.pop_screen", "Back")]
+    """Diyagram görüntüleyici. Varsayılan görünüm tembel açılan bir Tree: yalnızca açılan
+    düğümlerin komşuları eklenir, Tree de yalnızca görünen satırları çizer. [t] ile
+    Mermaid/ASCII metni (önbellekli, ayrı thread'de çizilir) gösterilir.
+
+    Girdi app üzerinden: diagram_root, diagram_depth, diagram_format, diagram_title."""
+    BINDINGS = [("q", "app.pop_screen", "Back"), ("t", "toggle_view", "Ağaç/Metin")]
+
+    CSS = """
+    #title { padding: 0 1; color: $primary; }
+    #tree, #text { height: 1fr; margin: 0 1; }
+    """
+
+    _key = None
+    _graph = None
+    _text_key = None
 
     def compose(self) -> ComposeResult:
         yield Header()
         yield Static("", id="title")
-        yield Static("", id="body")   # ← BU YOKTU, EKLEDİK
+        yield Tree("", id="tree")
+        text = TextArea("", id="text", read_only=True)
+        text.display = False
+        yield text
         yield Footer()
 
-    def on_show(self) -> None:
-        title = getattr(self.app, "diagram_title", "Diagram")
-        content = getattr(self.app, "diagram_content", "")
-        self.query_one("#title", Static).update(title)
-        self.query_one("#body", Static).update(content)
+    def on_screen_resume(self) -> None:
+        root = getattr(self.app, "diagram_root", None)
+        depth = getattr(self.app, "diagram_depth", 1)
+        fmt = getattr(self.app, "diagram_format", "mermaid")
+        self.query_one("#title", Static).update(getattr(self.app, "diagram_title", None) or "Diagram")
+        key, graph = (root, depth, fmt), get_graph()
+        if key == self._key and graph is self._graph:
+            return  # aynı diyagram, katalog değişmedi: açık düğümler korunur
+        self._key, self._graph, self._text_key = key, graph, None
+        tree = self.query_one("#tree", Tree)
+        tree.clear()
+        tree.root.set_label(root or "")
+        tree.root.data = {"name": root, "loaded": False}
+        if root:
+            self._expand_levels(tree.root, depth)
+        if self.query_one("#text", TextArea).display:
+            self._show_text()
+        tree.focus()
+
+    # ---- ağaç
+    def _load(self, node: TreeNode) -> None:
+        data = node.data
+        if data is None or data.get("loaded"):
+            return
+        data["loaded"] = True
+        data["edges"] = expand(data["name"])
+        data["offset"] = 0
+        self._add_page(node)
+
+    def _add_page(self, node: TreeNode) -> None:
+        data = node.data
+        edges, start = data["edges"], data["offset"]
+        ancestors = set()
+        p = node
+        while p is not None:
+            ancestors.add(p.data["name"])
+            p = p.parent
+        for rt, dst, has_kids in edges[start:start + TREE_PAGE]:
+            cycle = dst in ancestors
+            label = Text.assemble(dst, (f"  {rt}", "dim"), ("  ↺" if cycle else "", "yellow"))
+            node.add(label, data={"name": dst, "loaded": False}, allow_expand=has_kids and not cycle)
+        data["offset"] = start + TREE_PAGE
+        rest = len(edges) - data["offset"]
+        if rest > 0:
+            node.add_leaf(Text(f"… {rest} daha (Enter)", style="dim italic"), data={"more": True})
+
+    def _expand_levels(self, node: TreeNode, depth: int) -> None:
+        """Açılışta depth seviyeyi önceden aç (toplam MAX_NODES düğüme kadar)."""
+        frontier, budget = [node], MAX_NODES
+        for _ in range(depth):
+            nxt = []
+            for n in frontier:
+                if budget <= 0 or not n.allow_expand:
+                    continue
+                self._load(n)
+                n.expand()
+                budget -= len(n.children)
+                nxt.extend(c for c in n.children if not c.data.get("more"))
+            frontier = nxt
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        self._load(event.node)
+
+    def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
+        node = event.node
+        if node.data and node.data.get("more"):
+            parent = node.parent
+            node.remove()
+            self._add_page(parent)
+
+    # ---- metin
+    def action_toggle_view(self) -> None:
+        tree = self.query_one("#tree", Tree)
+        text = self.query_one("#text", TextArea)
+        tree.display, text.display = text.display, tree.display
+        if text.display:
+            self._show_text()
+            text.focus()
+        else:
+            tree.focus()
+
+    def _show_text(self) -> None:
+        if self._key is None or self._key == self._text_key:
+            return
+        root, depth, fmt = self._key
+        if not root:
+            return
+        self.query_one("#text", TextArea).load_text("…")
+        self._render_text(root, depth, fmt)
+
+    @work(thread=True, exclusive=True, group="diagram")
+    def _render_text(self, root: str, depth: int, fmt: str) -> None:
+        content = render(root, depth, fmt)
+        self.app.call_from_thread(self._text_done, (root, depth, fmt), content)
 
-    def on_resume(self) -> None:
-        data = self.get_data() or {}
-        self.query_one("#title", Static).update(data.get("title") or "Diagram")
-        self.query_one("#area", TextArea).load_text(data.get("content") or "")
+    def _text_done(self, key, content: str) -> None:
+        if key != self._key:
+            return
+        self._text_key = key
+        self.query_one("#text", TextArea).load_text(content)
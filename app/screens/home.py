@@ -1,16 +1,30 @@
 # REPLACE HomeScreen class (tamamı)
+import logging
 from core.audit import get_recent_logs
 from rich.table import Table  # ADD
+from textual import work
 from textual.screen import Screen
 from textual.app import ComposeResult
+from textual.worker import get_current_worker
 from textual.widgets import Header, Footer, Static, Input, DataTable, Button, TextArea
 
 from textual.containers import Vertical, Horizontal
-from core.search import fts_query
-from core.db import get_conn
+from core.search import SearchCache, fuzzy_rows, reverse_query
+from core.meta_derived import get_class_meta, cached_class_meta
+
+SEARCH_DEBOUNCE = 0.15  # sn; yazarken her tuşta değil, durunca ara
+SEARCH_LIMIT = 200
+# arama modları: class (FTS) | prop adı → sınıflar | enum sabiti → sınıflar
+SEARCH_MODES = ("class", "prop", "enum")
+_PLACEHOLDERS = {
+    "class": "fv, vlan, bgp… (isim, açıklama, prop içinde arar)",
+    "prop": "encap, operSt, lastFlapTs… (bu prop'a sahip sınıflar)",
+    "enum": "up, down, learned… (bu enum sabitine sahip sınıflar)",
+}
+
 
 class HomeScreen(Screen):
-    BINDINGS = [("q", "app.pop_screen", "Back"), ("x", "logout", "Quit")]
+    BINDINGS = [("q", "app.pop_screen", "Back"), ("x", "logout", "Quit"), ("ctrl+t", "cycle_mode", "Mode")]
 
     CSS = """
     #hdrline { padding: 0 1; color: $primary; }
@@ -25,11 +39,18 @@ class HomeScreen(Screen):
     .hint { color: $secondary; }
     """
 
+    _search_timer = None
+    _search_cache = SearchCache()
+    _mode = "class"
+    _detail_row = None
+    _detail_neighbors: tuple = ()
+    _detail_busy = False
+
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
         yield Static("", id="hdrline")
-        yield Input(placeholder="fv, vlan, bgp… (isim, açıklama, prop içinde arar)", id="search")
-        yield Static("Filters: [Namespace: *] [Has Regex: ✓]", id="filters")
+        yield Input(placeholder=_PLACEHOLDERS["class"], id="search")
+        yield Static(self._filters_text(), id="filters")
         with Horizontal(id="split"):
             # LEFT: classes table
             with Vertical(id="left"):
@@ -73,9 +94,52 @@ class HomeScreen(Screen):
         self.app.user = None
         self.app.pop_screen()
 
+    def _filters_text(self) -> str:
+        return f"Filters: [Mode: {self._mode} (ctrl+t)] [Namespace: *] [Has Regex: ✓]"
+
+    def action_cycle_mode(self) -> None:
+        self._mode = SEARCH_MODES[(SEARCH_MODES.index(self._mode) + 1) % len(SEARCH_MODES)]
+        inp = self.query_one("#search", Input)
+        inp.placeholder = _PLACEHOLDERS[self._mode]
+        self.query_one("#filters", Static).update(self._filters_text())
+        self._run_search(inp.value, self._mode)
+
 
     def on_input_changed(self, ev: Input.Changed) -> None:
-        items = fts_query(ev.value, limit=200)
+        if ev.input.id != "search":
+            return
+        # debounce: önceki zamanlayıcıyı iptal et, yazma durunca aramayı başlat
+        if self._search_timer is not None:
+            self._search_timer.stop()
+        value = ev.value
+        mode = self._mode
+        self._search_timer = self.set_timer(SEARCH_DEBOUNCE, lambda: self._run_search(value, mode))
+
+    @work(thread=True, exclusive=True, group="search")
+    def _run_search(self, q: str, mode: str = "class") -> None:
+        # exclusive: yeni arama eskisini iptal eder; iptal edilen SQL sorgusu da kesilir
+        worker = get_current_worker()
+        if mode != "class":
+            # ters arama index üzerinden, limit kadar satır okur
+            items = [dict(r, descr=f"{mode}: {r['via']}") for r in reverse_query(q, mode, limit=SEARCH_LIMIT)]
+            if not worker.is_cancelled:
+                self.app.call_from_thread(self._show_results, q, items, mode)
+            return
+        cancelled = lambda: worker.is_cancelled
+        items = self._search_cache.query(q, limit=SEARCH_LIMIT, cancelled=cancelled)
+        if items is None or worker.is_cancelled:
+            return
+        if len(items) < SEARCH_LIMIT:
+            # camelCase parçaları / yazım hataları (süre bütçeli)
+            extra = fuzzy_rows(q, SEARCH_LIMIT - len(items), {r["id"] for r in items}, cancelled)
+            if extra is None or worker.is_cancelled:
+                return
+            items = items + extra
+        self.app.call_from_thread(self._show_results, q, items, mode)
+
+    def _show_results(self, q: str, items: list, mode: str = "class") -> None:
+        if q != self.query_one("#search", Input).value or mode != self._mode:
+            return  # bu arada yeni bir şey yazıldı / mod değişti
         t: DataTable = self.query_one("#table", DataTable)
         t.clear()
         row_keys = []
@@ -115,42 +179,70 @@ class HomeScreen(Screen):
             self.app.pop_screen()
 
     # helpers
+    def _row_class(self, t: DataTable, index: int):
+        try:
+            return t.get_row_at(index)[0]
+        except Exception:
+            return None
+
     def _update_details_by_rowkey(self, row_key) -> None:
-        if row_key is None: 
+        """Vurgulanan satırın detayı: önbellekteyse hemen, değilse tek uçuşlu worker'la.
+        Ok tuşuna basılı tutulduğunda araya giren satırlar için sorgu atılmaz; worker
+        bittiğinde yalnızca en son hedef yüklenir. Komşu satırlar da önceden yüklenir."""
+        if row_key is None:
             return
         t: DataTable = self.query_one("#table", DataTable)
         try:
             row = t.get_row(row_key)
+            idx = t.get_row_index(row_key)
         except Exception:
             return
+        self._detail_row = row
+        self._detail_neighbors = tuple(n for n in (self._row_class(t, idx + 1), self._row_class(t, idx - 1)) if n)
+        meta = cached_class_meta(row[0])
+        if meta is not None:
+            self._render_details(row, meta)
+        self._request_details()
+
+    def _request_details(self) -> None:
+        if self._detail_busy or self._detail_row is None:
+            return
+        names = [n for n in (self._detail_row[0], *self._detail_neighbors) if cached_class_meta(n) is None]
+        if names:
+            self._detail_busy = True
+            self._load_details(self._detail_row, names)
+
+    @work(thread=True, group="details", exit_on_error=False)
+    def _load_details(self, row, names: list) -> None:
+        metas = {}
+        try:
+            for n in names:
+                metas[n] = get_class_meta(n)
+        except Exception:
+            logging.exception("sınıf detayı yüklenemedi: %s", names)
+        finally:
+            # hata olsa da meşgul bayrağı sıfırlanır; detay satırdaki bilgilerle çizilir
+            self.app.call_from_thread(self._details_done, row, metas.get(row[0]))
+
+    def _details_done(self, row, meta) -> None:
+        self._detail_busy = False
+        if self._detail_row is row:
+            self._render_details(row, meta)
+            return
+        # bu arada başka satıra geçildi: yalnızca en son hedef için devam
+        current = cached_class_meta(self._detail_row[0])
+        if current is not None:
+            self._render_details(self._detail_row, current)
+        self._request_details()
+
+    def _render_details(self, row, meta) -> None:
         cls_name, label, category, descr = row[0], row[1], row[2], row[3]
-        # DB'den rn/naming props/quick props & relations çek
-        conn = get_conn(); cur = conn.cursor()
-        cur.execute("SELECT rn_format, naming_props_csv, descr FROM classes WHERE name=?", (cls_name,))
-        cinfo = cur.fetchone()
-        cur.execute("""
-            SELECT p.name, p.is_naming
-            FROM props AS p
-            JOIN classes AS c ON c.id = p.class_id
-            WHERE c.name = ?
-            ORDER BY p.is_naming DESC, p.name
-            LIMIT 12
-        """, (cls_name,))
-        props = cur.fetchall()
-        cur.execute("""
-            SELECT COALESCE(c2.name, r.dst_name) AS dst
-            FROM relations r
-            LEFT JOIN classes c1 ON c1.id = r.src_class_id
-            LEFT JOIN classes c2 ON c2.id = r.dst_class_id
-            WHERE c1.name = ?
-            ORDER BY dst LIMIT 10
-        """, (cls_name,))
-        rels = [r[0] for r in cur.fetchall()]
-        conn.close()
-
-        rn = cinfo["rn_format"] if cinfo and cinfo["rn_format"] else "-"
-        nprops = cinfo["naming_props_csv"] if cinfo and cinfo["naming_props_csv"] else "-"
-        descr_full = cinfo["descr"] if cinfo and cinfo["descr"] else descr
+        props = meta.props[:12] if meta else ()
+        rels = sorted(d for _, d in meta.relations if d)[:10] if meta else []
+
+        rn = meta.rn_format if meta and meta.rn_format else "-"
+        nprops = ",".join(meta.naming_props) if meta and meta.naming_props else "-"
+        descr_full = meta.descr if meta and meta.descr else descr
 
         props_lines = "  • " + "\n  • ".join([f"{p[0]}{' (naming)' if p[1] else ''}" for p in props]) if props else "  • -"
         rels_lines = ""
@@ -178,15 +270,6 @@ Quick Actions:
 [B] Open Builder   [D] Diagram   [E] Examples"""
         )
         self.query_one("#details", Static).update(detail)
-    # Satır vurgusu değiştiğinde (ok tuşlarıyla gezerken genelde bu tetiklenir)
-    def on_data_table_row_highlighted(self, event: DataTable.RowHighlighted) -> None:
-        self._update_details_by_rowkey(event.row_key)
-
-    # Hücre vurgusu değiştiğinde (bazı sürümlerde satır yerine hücre tetiklenir)
-    def on_data_table_cell_highlighted(self, event: DataTable.CellHighlighted) -> None:
-        t: DataTable = self.query_one("#table", DataTable)
-        self._update_details_by_rowkey(t.cursor_row)
-
 
     def _goto_builder_with_rowkey(self, row_key) -> None:
         t: DataTable = self.query_one("#table", DataTable)
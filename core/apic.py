@@ -0,0 +1,251 @@
+# core/apic.py
+"""APIC REST yürütme katmanı: Builder'ın (class, Condition'lar, pipeline) girdilerini
+/api/class/<class>.json sorgusuna çevirir ve sonucu sayfa sayfa akıtır.
+
+    client = get_client("https://apic1", "admin", "***")
+    for line in client.run("fvTenant", conds, greps=['"^dn"']):
+        print(line)
+
+Koşullar query-target-filter ifadesine çevrilir (exact → eq, contains/regex/startswith
+→ wcard, in → or(eq, ...)). Kimliği doğrulanmış requests oturumları istemci başına
+bir havuzda tutulur; oturum süresi dolarsa (401/403) bir kez yeniden giriş yapılır.
+grep / sort -u / uniq CLI'daki gibi moquery biçimli satırlar üzerinde uygulanır.
+"""
+import logging, queue, re, threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.moquery import Condition
+from core.planner import run_planned
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_TIMEOUT = 30.0   # sn, istek başına
+SESSION_POOL_SIZE = 4    # istemci başına eşzamanlı oturum
+
+
+def _eq(class_name: str, prop: str, value: str) -> str:
+    return f'eq({class_name}.{prop},"{value}")'
+
+
+def _check_value(c: Condition, value: str):
+    # filtre dilinde kaçış yok: '"' dizgeyi bitirir, eq değerindeki parantez ifadeyi böler
+    if '"' in value:
+        raise ValueError(f'{c.prop}: değer çift tırnak (") içeremez: {value!r}')
+    if c.op in ("exact", "in"):
+        if "(" in value or ")" in value:
+            raise ValueError(f"{c.prop}: eşitlik değeri parantez içeremez (regex kullanın): {value!r}")
+    else:
+        try:
+            re.compile(value)  # wcard regex'i: dengesiz parantez APIC'te de geçersiz
+        except re.error as e:
+            raise ValueError(f"{c.prop}: geçersiz regex {value!r}: {e}") from None
+
+
+def condition_filter(class_name: str, c: Condition) -> str:
+    """Tek koşul → APIC filtre ifadesi. 'in' yerel motordaki gibi tam eşleşme kümesidir.
+    Filtreyi bozacak değerler (çift tırnak, eşitlikte parantez, geçersiz regex) ValueError."""
+    if c.op == "exact":
+        _check_value(c, c.value)
+        return _eq(class_name, c.prop, c.value)
+    if c.op == "in":
+        items = list(dict.fromkeys(x.strip() for x in c.value.split(",") if x.strip()))
+        for v in items:
+            _check_value(c, v)
+        parts = [_eq(class_name, c.prop, v) for v in items]
+        return parts[0] if len(parts) == 1 else f"or({','.join(parts)})"
+    val = f"^{c.value}" if c.op == "startswith" else c.value
+    _check_value(c, val)
+    return f'wcard({class_name}.{c.prop},"{val}")'
+
+
+def query_target_filter(class_name: str, conds: Sequence[Condition]) -> str:
+    parts = [condition_filter(class_name, c) for c in conds]
+    if not parts:
+        return ""
+    return parts[0] if len(parts) == 1 else f"and({','.join(parts)})"
+
+
+# ---- sonuç pipeline'ı (CLI'daki grep / sort -u / uniq karşılığı)
+_CLASS_SPLIT = re.compile(r"([a-z][a-z0-9]*)(.*)")
+
+
+def moquery_header(class_name: str) -> str:
+    """'fvTenant' → '# fv.Tenant' (moquery çıktısındaki başlık)."""
+    m = _CLASS_SPLIT.match(class_name)
+    return f"# {m.group(1)}.{m.group(2)}" if m and m.group(2) else f"# {class_name}"
+
+
+def moquery_lines(class_name: str, records: Iterable[Dict[str, str]]) -> Iterator[str]:
+    """Kayıtları moquery'nin düz metin biçiminde satırlara çevir."""
+    header = moquery_header(class_name)
+    for rec in records:
+        yield header
+        width = max((len(k) for k in rec), default=0)
+        for k, v in rec.items():
+            yield f"{k:<{width}} : {v}"
+        yield ""
+
+
+def _grep_regex(pattern: str):
+    # Builder grep'leri kabuk için tırnaklı BRE: '"operSt\|lastFlapTs"'
+    p = pattern.strip()
+    if len(p) >= 2 and p[0] == p[-1] and p[0] in "'\"":
+        p = p[1:-1]
+    return re.compile(p.replace("\\|", "|"))
+
+
+def apply_pipeline(lines: Iterable[str], greps: Optional[Sequence[str]] = None,
+                   sort_unique: bool = False, uniq: bool = False) -> Iterator[str]:
+    """grep'ler sırayla (akış halinde); sort -u tüm girdiyi ister, uniq akış halinde."""
+    for rx in [_grep_regex(g) for g in greps or ()]:
+        lines = (line for line in lines if rx.search(line))
+    if sort_unique:
+        yield from sorted(set(lines))
+        return
+    if uniq:
+        prev = None
+        for line in lines:
+            if line != prev:
+                yield line
+            prev = line
+        return
+    yield from lines
+
+
+class ApicError(RuntimeError):
+    pass
+
+
+class ApicClient:
+    """Tek bir APIC için oturum havuzlu REST istemcisi."""
+
+    def __init__(self, base_url: str, username: str, password: str, verify=True,
+                 timeout: float = DEFAULT_TIMEOUT, pool_size: int = SESSION_POOL_SIZE,
+                 page_size: int = DEFAULT_PAGE_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self._password = password
+        self.verify = verify
+        self.timeout = timeout
+        self.page_size = page_size
+        self.pool_size = pool_size
+        self._idle: "queue.LifoQueue[requests.Session]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    # ---- oturumlar
+    def _login(self, s: requests.Session):
+        r = s.post(f"{self.base_url}/api/aaaLogin.json", timeout=self.timeout, json={
+            "aaaUser": {"attributes": {"name": self.username, "pwd": self._password}}})
+        if r.status_code != 200:
+            raise ApicError(f"{self.base_url}: giriş başarısız ({r.status_code})")
+        # APIC-cookie oturuma yazılır; sonraki istekler onu taşır
+
+    def _new_session(self) -> requests.Session:
+        s = requests.Session()
+        s.verify = self.verify
+        # oturum başına tek TCP/TLS bağlantısı yeter; yeniden kullanılır (keep-alive)
+        s.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        s.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self._login(s)
+        return s
+
+    @contextmanager
+    def session(self):
+        """Havuzdan giriş yapılmış bir oturum al; en fazla pool_size eşzamanlı."""
+        self._slots.acquire()
+        s = None
+        try:
+            try:
+                s = self._idle.get_nowait()
+            except queue.Empty:
+                s = self._new_session()
+            yield s
+        except Exception:
+            if s is not None:
+                s.close()
+                s = None
+            raise
+        finally:
+            if s is not None:
+                self._idle.put(s)
+            self._slots.release()
+
+    def _get(self, s: requests.Session, path: str, params: Dict) -> Dict:
+        url = f"{self.base_url}{path}"
+        r = s.get(url, params=params, timeout=self.timeout)
+        if r.status_code in (401, 403):
+            # token süresi dolmuş: bir kez yeniden giriş
+            self._login(s)
+            r = s.get(url, params=params, timeout=self.timeout)
+        if r.status_code != 200:
+            raise ApicError(f"{url}: HTTP {r.status_code}: {r.text[:200]}")
+        return r.json()
+
+    # ---- sorgular
+    def class_query(self, class_name: str, conds: Sequence[Condition] = (),
+                    page_size: Optional[int] = None) -> Iterator[Dict[str, str]]:
+        """Sınıfın MO'larını (attributes) sayfa sayfa üret; tüm sonuç bellekte tutulmaz.
+        Sayfalar dn'e göre sıralı istenir ki sayfa sınırları kaymasın."""
+        size = page_size or self.page_size
+        params = {"order-by": f"{class_name}.dn", "page-size": size}
+        flt = query_target_filter(class_name, conds)
+        if flt:
+            params["query-target-filter"] = flt
+        page = 0
+        seen = 0
+        with self.session() as s:
+            while True:
+                params["page"] = page
+                data = self._get(s, f"/api/class/{class_name}.json", params)
+                imdata = data.get("imdata", [])
+                for item in imdata:
+                    for body in item.values():
+                        yield body.get("attributes", {})
+                seen += len(imdata)
+                total = int(data.get("totalCount", seen))
+                if len(imdata) < size or seen >= total:
+                    break
+                page += 1
+        logging.debug("apic %s: %s → %d MO, %d sayfa", self.base_url, class_name, seen, page + 1)
+
+    def run(self, class_name: str, conds: Sequence[Condition] = (), greps: Optional[Sequence[str]] = None,
+            sort_unique: bool = False, uniq: bool = False, page_size: Optional[int] = None) -> Iterator[str]:
+        """render_moquery ile aynı girdiler; çıktı moquery + pipeline satırları.
+        Büyük 'in' / alternasyon filtreleri alt sorgulara bölünüp paralel çalıştırılır
+        (core.planner); paralellik oturum havuzuyla sınırlıdır."""
+        records = run_planned(lambda cls, sub: self.class_query(cls, sub, page_size), class_name, conds,
+                              workers=self.pool_size)
+        return apply_pipeline(moquery_lines(class_name, records), greps, sort_unique, uniq)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_clients: Dict[tuple, ApicClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url: str, username: str, password: str, **kwargs) -> ApicClient:
+    """(url, kullanıcı) başına tek istemci: oturumlar sorgular arasında yeniden kullanılır."""
+    key = (base_url.rstrip("/"), username)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None or client._password != password:
+            if client is not None:
+                client.close()
+            client = _clients[key] = ApicClient(base_url, username, password, **kwargs)
+        return client
+
+
+def close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,196 @@
+# core/captures.py
+"""APIC'ten alınmış `moquery -c <class>` çıktılarının (yakalamaların) offline yüklenmesi.
+
+Çıktı biçimi:
+    # fv.Tenant
+    name         : common
+    dn           : uni/tn-common
+    <boş satır>
+Her MO bir '# paket.Sınıf' başlığı ve 'prop : değer' satırlarıdır. Dosya satır satır
+okunur; kayıtlar sınıf başına kolonlu bir tabloya (mo_<sınıf>, anahtar dn) toplu yazılır.
+Kolonlar katalogdaki props'tan gelir; katalogda olmayan prop'lar _extra (JSON) kolonuna.
+Bir sınıfın tablosu yalnızca o sınıfı içeren son yakalamanın MO'larını tutar. Yükleme tek
+transaction'dır: bellekte en fazla `batch` kayıt birikir, ama okuyucular yükleme commit
+edilene dek eski yakalamayı görür.
+"""
+import gzip, json, logging, re, time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.db import get_conn
+
+# bu kadar MO birikince tabloya yazılır (bellek kullanımı dosya boyutundan bağımsız; commit sonda)
+CAPTURE_BATCH = 5000
+# mo_<sınıf> tablolarının kendi kolonları; bu adlı prop'lar (ve geçersiz adlar) _extra'ya gider
+_RESERVED = {"dn", "capture_id", "_extra"}
+_COLUMN_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+_READ_BUFFER = 1 << 20
+
+
+def init_captures():
+    conn = get_conn(); cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS mo_captures (
+        id INTEGER PRIMARY KEY,
+        source TEXT,
+        loaded_at TEXT,
+        objects INTEGER,
+        classes INTEGER
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS mo_tables (
+        class_name TEXT PRIMARY KEY,
+        table_name TEXT,
+        capture_id INTEGER,           -- bu sınıfı en son yazan yakalama
+        objects INTEGER               -- o yakalamada yazılan MO sayısı
+    );
+    """)
+    conn.commit(); conn.close()
+
+
+def class_from_header(line: str) -> str:
+    """'# fv.Tenant' → 'fvTenant' (mim_loader'daki cobra.model.fv.Tenant eşlemesiyle aynı)."""
+    return line.lstrip("#").strip().replace(".", "")
+
+
+def table_for(class_name: str) -> str:
+    return "mo_" + "".join(ch if ch.isalnum() or ch == "_" else "_" for ch in class_name)
+
+
+def parse_moquery(lines: Iterable[str]) -> Iterator[Tuple[Optional[str], Dict[str, str]]]:
+    """(sınıf, {prop: değer}) kayıtları üret. Boş satır ya da yeni başlık kaydı bitirir;
+    'Total Objects shown: N' gibi anahtarında boşluk olan satırlar atlanır."""
+    cls = None
+    rec: Dict[str, str] = {}
+    for line in lines:
+        if line[:1] == "#":
+            if rec:
+                yield cls, rec
+                rec = {}
+            cls = class_from_header(line)
+            continue
+        key, sep, val = line.partition(":")
+        if not sep:
+            if rec and not line.strip():
+                yield cls, rec
+                rec = {}
+            continue
+        key = key.rstrip()
+        if not key or " " in key:
+            continue
+        rec[key] = val.strip()
+    if rec:
+        yield cls, rec
+
+
+def _open(path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace", buffering=_READ_BUFFER)
+
+
+class _ClassTable:
+    """Bir sınıfın hedef tablosu: kolon sırası, INSERT cümlesi ve bekleyen satırlar."""
+    __slots__ = ("name", "table", "cols", "colset", "sql", "rows", "count")
+
+    def __init__(self, cur, name: str, first: Dict[str, str]):
+        self.name = name
+        self.table = table_for(name)
+        cols = [r[0] for r in cur.execute(
+            "SELECT p.name FROM props p JOIN classes c ON c.id = p.class_id WHERE c.name = ? ORDER BY p.id;",
+            (name,))]
+        if not cols:
+            # katalogda yok: ilk kaydın prop'ları
+            cols = list(first)
+        # yalnızca düz tanımlayıcılar kolon olur (DDL'e gömülüyor); SQLite kolon adları büyük/küçük
+        # harf duyarsız: aynı adın ikinci yazımı _extra'ya düşer
+        cols = [c for c in cols if _COLUMN_NAME.match(c) and c.lower() not in _RESERVED]
+        cols = list({c.lower(): c for c in reversed(cols)}.values())[::-1]
+        coldefs = ", ".join(f'"{c}" TEXT' for c in cols)
+        cur.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}" '
+                    f'(dn TEXT PRIMARY KEY, capture_id INTEGER, {coldefs}{", " if cols else ""}_extra TEXT) WITHOUT ROWID;')
+        cur.execute(f'CREATE INDEX IF NOT EXISTS "{self.table}_capture" ON "{self.table}"(capture_id);')
+        have = {r[1] for r in cur.execute(f'PRAGMA table_info("{self.table}");')}
+        for c in cols:
+            if c not in have:  # katalog yeni prop kazanmış
+                cur.execute(f'ALTER TABLE "{self.table}" ADD COLUMN "{c}" TEXT;')
+        self.cols = cols
+        self.colset = frozenset(cols) | {"dn"}
+        names = ", ".join(f'"{c}"' for c in ["dn", "capture_id", *cols, "_extra"])
+        self.sql = f'INSERT OR REPLACE INTO "{self.table}"({names}) VALUES ({", ".join("?" * (len(cols) + 3))});'
+        self.rows: List[tuple] = []
+        self.count = 0
+
+    def add(self, capture_id: int, rec: Dict[str, str]):
+        get = rec.get
+        extra = rec.keys() - self.colset
+        self.rows.append((rec["dn"], capture_id, *[get(c) for c in self.cols],
+                          json.dumps({k: rec[k] for k in extra}) if extra else None))
+
+    def flush(self, cur):
+        if self.rows:
+            cur.executemany(self.sql, self.rows)
+            self.count += len(self.rows)
+            self.rows = []
+
+
+def load_capture(path, source: Optional[str] = None, batch: int = CAPTURE_BATCH) -> Dict:
+    """moquery yakalamasını (düz ya da .gz) yükle; özet istatistikleri döndür."""
+    init_captures()
+    t0 = time.perf_counter()
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        cur.execute("INSERT INTO mo_captures(source, loaded_at, objects, classes) VALUES (?,?,0,0);",
+                    (source or str(path), datetime.now(timezone.utc).isoformat()))
+        capture_id = cur.lastrowid
+        tables: Dict[str, _ClassTable] = {}
+        pending = skipped = 0
+
+        def flush():
+            # commit yok: yükleme tek transaction, okuyucular (WAL) bitene dek eski yakalamayı görür
+            for t in tables.values():
+                t.flush(cur)
+
+        with _open(path) as f:
+            for cls, rec in parse_moquery(f):
+                if not cls or "dn" not in rec:
+                    skipped += 1
+                    continue
+                t = tables.get(cls)
+                if t is None:
+                    t = tables[cls] = _ClassTable(cur, cls, rec)
+                t.add(capture_id, rec)
+                pending += 1
+                if pending >= batch:
+                    flush()
+                    pending = 0
+        flush()
+        objects = sum(t.count for t in tables.values())
+        # tablo sınıfın son yakalamasını tutar: bu yakalamada olmayan (eski) MO'lar silinir.
+        # Satırlar, silme ve mo_tables tek transaction'da; yükleme yarıda kalırsa close() hepsini
+        # geri alır ve eski yakalama eksiksiz kalır
+        for t in tables.values():
+            cur.execute(f'DELETE FROM "{t.table}" WHERE capture_id != ?;', (capture_id,))
+        cur.executemany(
+            "INSERT OR REPLACE INTO mo_tables(class_name, table_name, capture_id, objects) VALUES (?,?,?,?);",
+            [(t.name, t.table, capture_id, t.count) for t in tables.values()])
+        cur.execute("UPDATE mo_captures SET objects=?, classes=? WHERE id=?;", (objects, len(tables), capture_id))
+        conn.commit()
+    finally:
+        conn.close()
+    secs = time.perf_counter() - t0
+    logging.info("yakalama yüklendi: %s (%d MO, %d sınıf, %.1f s)", path, objects, len(tables), secs)
+    return {"capture_id": capture_id, "objects": objects, "classes": len(tables), "skipped": skipped, "seconds": secs}
+
+
+def last_capture_table(class_name: str) -> Optional[Tuple[str, int]]:
+    """Sınıfın en son yüklendiği tablo ve yakalama id'si; hiç yüklenmediyse None."""
+    init_captures()
+    conn = get_conn()
+    try:
+        row = conn.execute("SELECT table_name, capture_id FROM mo_tables WHERE class_name = ?;",
+                           (class_name,)).fetchone()
+    finally:
+        conn.close()
+    return (row[0], row[1]) if row else None
@@ -1,19 +1,211 @@
-import sqlite3
+import atexit, logging, sqlite3, threading, time, weakref
 from pathlib import Path
 
 DB_PATH = Path(__file__).resolve().parent.parent / "spinode.db"
 
-SCHEMA_VERSION = 3
+SCHEMA_VERSION = 10
+
+# her bağlantıda uygulanan ayarlar (WAL: birden çok TUI aynı DB'yi okurken/yazarken kilitlenmesin)
+PRAGMAS = (
+    "PRAGMA foreign_keys=ON;",
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA busy_timeout=5000;",
+    "PRAGMA cache_size=-20000;",       # ~20 MB sayfa önbelleği
+    "PRAGMA mmap_size=268435456;",     # 256 MB
+    "PRAGMA temp_store=MEMORY;",
+)
+STATEMENT_CACHE = 256
+
+# çalışma anında salt-okunur katalog tabloları (sıra: önce ebeveyn)
+CATALOG_TABLES = ("classes", "props", "prop_enums", "relations", "deployment_paths", "mim_modules",
+                  "class_templates", "class_pipeline_options", "class_dn_paths")
+FTS_TABLES = ("class_fts", "class_trgm")
+# trigram tokenizer'ı SQLite 3.34+ ister; eskilerde class_trgm kurulmaz (bulanık arama edit mesafesine düşer)
+HAS_TRIGRAM = sqlite3.sqlite_version_info >= (3, 34, 0)
+# class_fts kolonları; FTS_WEIGHTS aynı sırada bm25 ağırlıkları (isim eşleşmesi en önde)
+FTS_COLUMNS = ("name", "label", "category", "descr", "rn_format", "naming_props", "props")
+FTS_WEIGHTS = (10.0, 4.0, 1.0, 1.0, 2.0, 3.0, 0.5)
+
+# opt-in in-memory katalog kopyası (paylaşımlı cache: tüm thread'ler aynı kopyayı görür)
+MEMORY_CATALOG_URI = "file:spinode_catalog?mode=memory&cache=shared"
+_memory_holder = None
+
+_local = threading.local()
+_all_conns: "weakref.WeakSet[PooledConnection]" = weakref.WeakSet()
+
+
+class PooledConnection(sqlite3.Connection):
+    """Thread başına tekrar kullanılan bağlantı.
+
+    close() bağlantıyı kapatmaz: açık kalmış transaction'ı geri alıp havuza bırakır.
+    Havuzdaki bağlantı kullanımdayken (iç içe get_conn) ayrı bir bağlantı verilir; her
+    kullanıcının kendi transaction'ı olur, içteki commit() dıştakinin yarım yazmalarını
+    commit etmez. `with get_conn() as conn:` blok başarıyla biterse commit, hata olursa
+    rollback eder ve bağlantıyı her durumda bırakır."""
+
+    key = None  # havuz anahtarı: DB yolu ya da MEMORY_CATALOG_URI
+    in_use = False
+    pooled = True
+    closed = False
+
+    def close(self):
+        if self.closed:
+            return
+        if self.in_transaction:
+            self.rollback()
+        if self.pooled:
+            self.in_use = False
+        else:
+            self.really_close()
+
+    def really_close(self):
+        self.closed = True
+        super().close()
+
+    def __exit__(self, *exc):
+        try:
+            return super().__exit__(*exc)
+        finally:
+            self.close()
+
+
+def connect(path=None, factory=sqlite3.Connection):
+    """Ayarlı yeni bir bağlantı aç (havuz dışı; çağıran kapatır)."""
+    conn = sqlite3.connect(
+        path or DB_PATH, timeout=5.0, cached_statements=STATEMENT_CACHE,
+        factory=factory, check_same_thread=False,
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _checkout(key: str, opener):
+    """Thread'in `key` bağlantısını ver; kullanımdaysa kendi transaction'ı olan ayrı bir
+    bağlantı aç (close() onu gerçekten kapatır)."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(key)
+    if conn is None or conn.closed:
+        conn = conns[key] = opener()
+    elif conn.in_use:
+        conn = opener()
+        conn.pooled = False
+    conn.key = key
+    _all_conns.add(conn)
+    conn.in_use = True
+    return conn
+
 
 def get_conn():
-    conn = sqlite3.connect(DB_PATH)
+    """Bu thread'in DB_PATH bağlantısı (yoksa açılır). `with get_conn() as conn:` ile kullan
+    ya da işin bitince (try/finally) close() çağır."""
+    return _checkout(str(DB_PATH), lambda: connect(DB_PATH, factory=PooledConnection))
+
+
+def _catalog_tables(conn) -> set[str]:
+    names = set(CATALOG_TABLES)
+    for fts in FTS_TABLES:
+        names.update(r[0] for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND (name=? OR name LIKE ? ESCAPE '\\');",
+            (fts, fts.replace("_", "\\_") + "\\_%"),
+        ))
+    return names
+
+
+def enable_memory_catalog() -> float:
+    """Katalog tablolarını paylaşımlı bir in-memory DB'ye kopyala (backup API).
+    Sonrasında get_catalog_conn() bu kopyayı döndürür; yazmalar dosya DB'de kalır.
+    Kopyalama süresini (s) döndürür; tekrar çağrılırsa kopyayı yeniler."""
+    global _memory_holder
+    t0 = time.perf_counter()
+    if _memory_holder is None:
+        _memory_holder = sqlite3.connect(MEMORY_CATALOG_URI, uri=True, check_same_thread=False)
+    src = sqlite3.connect(DB_PATH)
+    try:
+        src.backup(_memory_holder)
+    finally:
+        src.close()
+    # kullanıcı/log gibi tablolar kopyada tutulmaz
+    keep = _catalog_tables(_memory_holder)
+    for (name,) in _memory_holder.execute("SELECT name FROM sqlite_master WHERE type='table';").fetchall():
+        if name not in keep and not name.startswith("sqlite_"):
+            _memory_holder.execute(f'DROP TABLE IF EXISTS "{name}";')
+    _memory_holder.commit()
+    secs = time.perf_counter() - t0
+    n = _memory_holder.execute("SELECT COUNT(*) FROM classes;").fetchone()[0]
+    logging.info("in-memory katalog hazır: %d class, %.0f ms", n, secs * 1000)
+    return secs
+
+
+def refresh_memory_catalog():
+    """Katalog dosya DB'de yeniden yüklendikten sonra (load_all / import_snapshot) kopyayı
+    tazele; kopya kapalıysa bir şey yapmaz. Bellek içi önbellekler catalog_stamp()'i
+    kopyadan okur, tazelenmezse geçersiz kılınmazlar."""
+    if _memory_holder is not None:
+        enable_memory_catalog()
+
+
+def disable_memory_catalog():
+    """Kopyayı ve tüm thread'lerin kopya bağlantılarını kapat."""
+    global _memory_holder
+    if _memory_holder is not None:
+        for conn in list(_all_conns):
+            if conn.key == MEMORY_CATALOG_URI and not conn.closed:
+                conn.really_close()
+        _memory_holder.close()
+        _memory_holder = None
+
+
+def memory_catalog_enabled() -> bool:
+    return _memory_holder is not None
+
+
+def _open_replica():
+    conn = sqlite3.connect(MEMORY_CATALOG_URI, uri=True, cached_statements=STATEMENT_CACHE,
+                           factory=PooledConnection, check_same_thread=False)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys=ON;")
+    conn.execute("PRAGMA query_only=ON;")
+    conn.execute("PRAGMA read_uncommitted=ON;")
     return conn
 
 
-def init_db():
-    conn = get_conn(); cur = conn.cursor()
+def get_catalog_conn():
+    """Katalog okumaları için bağlantı: in-memory kopya açıksa onu, değilse get_conn()."""
+    if _memory_holder is None:
+        return get_conn()
+    return _checkout(MEMORY_CATALOG_URI, _open_replica)
+
+
+def catalog_stamp() -> tuple:
+    """MIM yüklemesinin damgası (modül sayısı, son yükleme zamanı); başka bir süreç
+    kataloğu yeniden yüklediyse değişir. Bellek içi önbellekler bununla geçersiz kılınır."""
+    conn = get_catalog_conn()
+    try:
+        return tuple(conn.execute("SELECT COUNT(*), MAX(loaded_at) FROM mim_modules;").fetchone())
+    finally:
+        conn.close()
+
+
+def close_all():
+    """Havuzdaki tüm bağlantıları gerçekten kapat (çıkışta / DB dosyası değişince)."""
+    for conn in list(_all_conns):
+        try:
+            conn.really_close()
+        except sqlite3.Error:
+            pass
+    _all_conns.clear()
+    _local.conns = {}
+
+
+atexit.register(close_all)
+
+
+def _migrate(cur):
+    """Şemayı kur / güncelle; sonradan yapılacak ağır işler için bayraklar döndürür."""
     cur.execute("PRAGMA user_version;")
     ver = cur.fetchone()[0] or 0
 
@@ -95,13 +287,98 @@ def init_db():
     """)
     cur.execute("CREATE INDEX IF NOT EXISTS ix_logs_created_at ON logs(created_at DESC);")
 
-    cur.execute("""
+    # v5: tek 'content' kolonu yerine ayrı kolonlar (bm25 ağırlıkları) + prefix indeksleri
+    fts_cols = [r[1] for r in cur.execute("PRAGMA table_info(class_fts);").fetchall()]
+    fts_migrated = bool(fts_cols) and fts_cols != list(FTS_COLUMNS)
+    if fts_migrated:
+        cur.execute("DROP TABLE class_fts;")
+    cur.execute(f"""
     CREATE VIRTUAL TABLE IF NOT EXISTS class_fts
-    USING fts5(content, tokenize='unicode61');
+    USING fts5({", ".join(FTS_COLUMNS)}, tokenize='unicode61', prefix='2 3 4');
+    """)
+
+    # v6: FTS değişiklik günlüğü — tetikleyiciler dokunulan sınıfları işaretler,
+    # sync_fts yalnızca onları yeniden indeksler
+    cur.execute("CREATE TABLE IF NOT EXISTS fts_dirty (class_id INTEGER PRIMARY KEY);")
+    for name, event, ids in _FTS_TRIGGERS:
+        body = " ".join(f"INSERT OR IGNORE INTO fts_dirty(class_id) VALUES ({i});" for i in ids)
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END;")
+
+    # v7: sınıf adları üzerinde trigram indeksi (camelCase içi / yazım hatası toleranslı arama);
+    # classes tablosuna external-content, tetikleyicilerle güncel tutulur
+    has_trgm = cur.execute("SELECT 1 FROM sqlite_master WHERE name='class_trgm';").fetchone() is not None
+    if HAS_TRIGRAM:
+        cur.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS class_trgm
+        USING fts5(name, content='classes', content_rowid='id', tokenize='trigram');
+        """)
+        for name, event, body in _TRGM_TRIGGERS:
+            cur.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END;")
+        if not has_trgm:
+            cur.execute("INSERT INTO class_trgm(class_trgm) VALUES('rebuild');")
+    else:
+        # yeni SQLite'ta kurulmuş DB: tetikleyiciler tokenizer'ı olmayan tabloya yazamaz
+        for name, _, _ in _TRGM_TRIGGERS:
+            cur.execute(f"DROP TRIGGER IF EXISTS {name};")
+
+    # NEW: modül parmak izleri (artımlı MIM yükleme)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS mim_modules (
+        module TEXT PRIMARY KEY,
+        version TEXT,                 -- acimodel sürümü
+        hash TEXT,                    -- kaynak dosya sha1
+        loaded_at TEXT DEFAULT (datetime('now'))
+    );
+    """)
+
+    # v9: yükleme sonunda türetilen şablonlar / pipeline seçenekleri (core.meta_derived.materialize)
+    has_materialized = cur.execute("SELECT 1 FROM sqlite_master WHERE name='class_templates';").fetchone() is not None
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS class_templates (
+        id INTEGER PRIMARY KEY,
+        class_id INTEGER REFERENCES classes(id) ON DELETE CASCADE,
+        kind TEXT,                    -- alias_regex | name_prefix | descr_contains | enum_in | encap
+        pos INTEGER,
+        title TEXT,
+        conds TEXT,                   -- JSON: [{"prop","op","value"}]
+        pipes TEXT                    -- JSON: ["grep:^name", ...]
+    );
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS class_pipeline_options (
+        id INTEGER PRIMARY KEY,
+        class_id INTEGER REFERENCES classes(id) ON DELETE CASCADE,
+        pos INTEGER,
+        opt_id TEXT,
+        label TEXT
+    );
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_templates_class ON class_templates(class_id, pos);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_templates_kind ON class_templates(kind, class_id);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_class ON class_pipeline_options(class_id, pos);")
+
+    # v10: kökten her sınıfa en kısa containment zinciri ve DN şablonu (core.graph.materialize_dn_paths)
+    has_dn_paths = cur.execute("SELECT 1 FROM sqlite_master WHERE name='class_dn_paths';").fetchone() is not None
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS class_dn_paths (
+        class_id INTEGER PRIMARY KEY REFERENCES classes(id) ON DELETE CASCADE,
+        root_id INTEGER,
+        depth INTEGER,                -- kökten hop sayısı
+        chain TEXT,                   -- kökten sınıfa class adları, '/' ile
+        dn_template TEXT              -- ör. uni/tn-{name}/ap-{name}/epg-{name}
+    );
     """)
 
     cur.execute("CREATE INDEX IF NOT EXISTS idx_classes_name ON classes(name);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_classes_module ON classes(module);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_rel_src ON relations(src_class_id);")
+    # ilişki çözümü / rel_type bazlı gezinme / enum aramaları için
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_rel_dst_name ON relations(dst_name);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_rel_type_src ON relations(rel_type, src_class_id);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_prop_enums_class_prop ON prop_enums(class_id, prop_name);")
+    # ters arama: prop adı / enum sabiti → sınıflar (büyük/küçük harf duyarsız, önek)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_props_name_nocase ON props(name COLLATE NOCASE, class_id);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_prop_enums_const_nocase ON prop_enums(const_name COLLATE NOCASE, class_id);")
 
     # add missing columns for older DBs (safe migrations)
     _safe_add_column(cur, "classes", "rn_format", "TEXT")
@@ -114,7 +391,41 @@ def init_db():
     if ver < SCHEMA_VERSION:
         cur.execute(f"PRAGMA user_version={SCHEMA_VERSION};")
 
-    conn.commit(); conn.close()
+    return fts_migrated, has_materialized, has_dn_paths
+
+
+def init_db():
+    with get_conn() as conn:
+        fts_migrated, has_materialized, has_dn_paths = _migrate(conn.cursor())
+    if fts_migrated:
+        rebuild_fts()
+    if not has_materialized:
+        from core.meta_derived import materialize
+        materialize()
+    if not has_dn_paths:
+        from core.graph import materialize_dn_paths
+        materialize_dn_paths()
+
+
+# (tetikleyici, olay, işaretlenecek class id'leri)
+_FTS_TRIGGERS = (
+    ("trg_fts_classes_ins", "AFTER INSERT ON classes", ("new.id",)),
+    ("trg_fts_classes_upd",
+     "AFTER UPDATE OF name, label, category, descr, rn_format, naming_props_csv ON classes", ("new.id",)),
+    ("trg_fts_classes_del", "AFTER DELETE ON classes", ("old.id",)),
+    ("trg_fts_props_ins", "AFTER INSERT ON props", ("new.class_id",)),
+    ("trg_fts_props_upd", "AFTER UPDATE OF name, class_id ON props", ("old.class_id", "new.class_id")),
+    ("trg_fts_props_del", "AFTER DELETE ON props", ("old.class_id",)),
+)
+
+
+_TRGM_DELETE = "INSERT INTO class_trgm(class_trgm, rowid, name) VALUES('delete', old.id, old.name);"
+_TRGM_INSERT = "INSERT INTO class_trgm(rowid, name) VALUES (new.id, new.name);"
+_TRGM_TRIGGERS = (
+    ("trg_trgm_classes_ins", "AFTER INSERT ON classes", _TRGM_INSERT),
+    ("trg_trgm_classes_upd", "AFTER UPDATE OF name ON classes", _TRGM_DELETE + " " + _TRGM_INSERT),
+    ("trg_trgm_classes_del", "AFTER DELETE ON classes", _TRGM_DELETE),
+)
 
 
 def _safe_add_column(cur, table: str, col: str, decl: str):
@@ -124,16 +435,69 @@ def _safe_add_column(cur, table: str, col: str, decl: str):
         cur.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl};")
 
 
-def rebuild_fts():
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("DELETE FROM class_fts;")
-    cur.execute("""
+def fts_insert_sql(where: str = "") -> str:
+    """classes/props'tan class_fts'e toplu INSERT ... SELECT.
+    Tam kurulumda prop listesi tek GROUP BY ile, `where` ile süzülen az sayıda sınıf
+    için ise index üzerinden sınıf başına toplanır."""
+    if where:
+        props, join = "(SELECT GROUP_CONCAT(p.name, ' ') FROM props p WHERE p.class_id = c.id)", ""
+    else:
+        props = "p.names"
+        join = """LEFT JOIN (SELECT class_id, GROUP_CONCAT(name, ' ') AS names FROM props GROUP BY class_id) p
+           ON p.class_id = c.id"""
+    return f"""
+    INSERT INTO class_fts(rowid, {", ".join(FTS_COLUMNS)})
     SELECT c.id, c.name, COALESCE(c.label,''), COALESCE(c.category,''), COALESCE(c.descr,''),
-           COALESCE(c.rn_format,''), COALESCE(c.naming_props_csv,''),
-           COALESCE((SELECT GROUP_CONCAT(p.name, ' ') FROM props p WHERE p.class_id=c.id), '')
-    FROM classes c;
-    """)
-    for r in cur.fetchall():
-        content = " ".join([r[1], r[2], r[3], r[4], r[5], r[6], r[7]]).strip()
-        cur.execute("INSERT INTO class_fts(rowid, content) VALUES(?, ?);", (r[0], content))
-    conn.commit(); conn.close()
+           COALESCE(c.rn_format,''), COALESCE(REPLACE(c.naming_props_csv, ',', ' '),''),
+           COALESCE({props},'')
+    FROM classes c
+    {join}
+    {where};
+    """
+
+
+def has_trigram_index(conn) -> bool:
+    """class_trgm kullanılabilir mi (SQLite 3.34+ ve tablo kurulmuş)."""
+    return HAS_TRIGRAM and conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name='class_trgm';").fetchone() is not None
+
+
+def _rebuild_all(cur):
+    cur.execute("DELETE FROM class_fts;")
+    cur.execute(fts_insert_sql())
+    cur.execute("DELETE FROM fts_dirty;")
+    if has_trigram_index(cur.connection):
+        cur.execute("INSERT INTO class_trgm(class_trgm) VALUES('rebuild');")
+
+
+def rebuild_fts(class_ids=None):
+    """FTS indeksini tek INSERT ... SELECT ile baştan kur (göç, bozulma vb. nadir durumlar).
+    class_ids verilirse yalnızca o sınıflar işaretlenip sync_fts ile güncellenir."""
+    if class_ids is not None:
+        with get_conn() as conn:
+            conn.executemany("INSERT OR IGNORE INTO fts_dirty(class_id) VALUES (?);", [(i,) for i in class_ids])
+        sync_fts()
+        return
+    with get_conn() as conn:
+        _rebuild_all(conn.cursor())
+
+
+def sync_fts() -> int:
+    """fts_dirty'deki sınıfları yeniden indeksle; işlenen sınıf sayısını döndür.
+    Kataloğun yarısından fazlası değişmişse toplu yeniden kurulum daha ucuzdur."""
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        ids = [r[0] for r in cur.execute("SELECT class_id FROM fts_dirty;")]
+        if not ids:
+            return 0
+        total = cur.execute("SELECT COUNT(*) FROM classes;").fetchone()[0]
+        if len(ids) * 2 >= total:
+            _rebuild_all(cur)
+        else:
+            cur.executemany("DELETE FROM class_fts WHERE rowid=?;", [(i,) for i in ids])
+            cur.execute(fts_insert_sql("WHERE c.id IN (SELECT class_id FROM fts_dirty)"))
+            cur.execute("DELETE FROM fts_dirty;")
+        conn.commit()
+        return len(ids)
+    finally:
+        conn.close()
@@ -1,39 +1,98 @@
-from typing import List
-from core.db import get_conn
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.graph import get_graph
+
+# çizimler bu kadar düğümde kesilir (ekran / Mermaid render sınırı)
+MAX_NODES = 300
+ASCII_FANOUT = 12  # ekranda taşıma yapmasın
+FORMATS = ("mermaid", "ascii")
+FRAGMENT_CACHE_SIZE = 64  # (root, depth, format) başına çizilmiş metin
 
 def neighbors_of(class_name: str) -> List[str]:
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT COALESCE(c2.name, r.dst_name) AS dst
-        FROM relations r
-        LEFT JOIN classes c1 ON c1.id = r.src_class_id
-        LEFT JOIN classes c2 ON c2.id = r.dst_class_id
-        WHERE c1.name = ?
-        ORDER BY dst
-        """,
-        (class_name,)
-    )
-    nbs = [row[0] for row in cur.fetchall() if row[0]]
-    conn.close()
-    return nbs
-
-def to_mermaid(root: str) -> str:
-    nbs = neighbors_of(root)
+    return get_graph().neighbors(class_name)
+
+def expand(class_name: str, rel_types: Optional[Iterable[str]] = None,
+           reverse: bool = False) -> List[Tuple[str, str, bool]]:
+    """Ağaç görünümünde bir düğümü açmak için: (rel_type, komşu, komşunun da kenarı var mı)."""
+    g = get_graph()
+    return [(rt, dst, g.degree(dst, rel_types, reverse) > 0) for rt, dst in g.edges(class_name, rel_types, reverse)]
+
+def _tree(root: str, depth: int, rel_types: Optional[Iterable[str]], reverse: bool) -> Dict[str, List[str]]:
+    return get_graph().subtree(root, depth, rel_types, reverse, MAX_NODES)
+
+def to_mermaid(root: str, depth: int = 1, rel_types: Optional[Iterable[str]] = None, reverse: bool = False) -> str:
+    edges = get_graph().bfs(root, depth, rel_types, reverse, MAX_NODES)
     lines = ["graph TD"]
-    if not nbs:
-        return "".join(lines + [f"  {root}"])
-    for nb in nbs:
-        lines.append(f"  {root} --> {nb}")
-    return "".join(lines)
-
-def to_ascii(root: str) -> str:
-    nbs = neighbors_of(root)
-    if not nbs:
-        return f"+-----------+| {root:<9} |+-----------+"
+    if not edges:
+        return "\n".join(lines + [f"  {root}"])
+    for _, src, dst, _ in edges:
+        lines.append(f"  {src} --> {dst}")
+    return "\n".join(lines)
+
+def to_ascii(root: str, depth: int = 1, rel_types: Optional[Iterable[str]] = None, reverse: bool = False) -> str:
+    tree = _tree(root, depth, rel_types, reverse)
+    if not tree.get(root):
+        return f"+-----------+\n| {root:<9} |\n+-----------+"
     lines = [f"[{root}]"]
-    for nb in nbs[:12]:  # ekranda taşıma yapmasın
-        lines.append(f"  └─> [{nb}]")
-    if len(nbs) > 12:
-        lines.append("  └─> [...]")
-    return "".join(lines)
\ No newline at end of file
+    drawn = {root}
+
+    def walk(node: str, indent: str):
+        kids = tree.get(node, [])
+        for nb in kids[:ASCII_FANOUT]:
+            lines.append(f"{indent}└─> [{nb}]")
+            # her düğüm bir kez açılır (döngüler / ortak alt ağaçlar)
+            if nb not in drawn:
+                drawn.add(nb)
+                walk(nb, indent + "      ")
+        if len(kids) > ASCII_FANOUT:
+            lines.append(f"{indent}└─> [...]")
+
+    walk(root, "  ")
+    return "\n".join(lines)
+
+_RENDERERS = {"mermaid": to_mermaid, "ascii": to_ascii}
+
+
+class _FragmentCache:
+    """Çizilmiş diyagram metinleri için LRU. Graf nesnesi değişince (katalog yeniden
+    yüklendi / invalidate_graph) tümü düşer; kontrol get_graph()'ın stamp TTL'ine dayanır."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[tuple, str]" = OrderedDict()
+        self._graph = None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._graph = None
+
+    def get(self, key: tuple, build) -> str:
+        g = get_graph()
+        with self._lock:
+            if g is not self._graph:
+                self._data.clear()
+                self._graph = g
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        text = build()
+        with self._lock:
+            if g is self._graph:
+                self._data[key] = text
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return text
+
+
+_fragments = _FragmentCache(FRAGMENT_CACHE_SIZE)
+
+
+def render(root: str, depth: int = 1, fmt: str = "mermaid",
+           rel_types: Optional[Iterable[str]] = None, reverse: bool = False) -> str:
+    """Önbellekli to_mermaid / to_ascii."""
+    rel_key = tuple(rel_types) if rel_types is not None else None
+    return _fragments.get((root, depth, fmt, rel_key, reverse),
+                          lambda: _RENDERERS[fmt](root, depth, rel_types, reverse))
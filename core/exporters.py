@@ -1 +1,167 @@
 # Export to JSON / clipboard
+# core/exporters.py
+"""Tüm model (ya da bir paket / alt ağaç) grafını satır satır SQL imlecinden dosyaya yazar;
+bellek kullanımı graf boyutundan bağımsızdır (tekilleştirme SQLite'ın geçici B-tree'sinde)."""
+import json, re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from core.db import get_catalog_conn
+
+FORMATS = ("mermaid", "dot", "graphml")
+# alt ağaç gezinmesinde varsayılan derinlik
+SUBTREE_DEPTH = 64
+_EXT = {".mmd": "mermaid", ".mermaid": "mermaid", ".dot": "dot", ".gv": "dot", ".graphml": "graphml"}
+_MODULE_PREFIX = "cobra.modelimpl."
+
+
+def format_for(path) -> str:
+    return _EXT.get(Path(path).suffix.lower(), "mermaid")
+
+
+# alt ağaçta rel_type verilmezse yalnızca containment aşağı doğru izlenir
+SUBTREE_REL_TYPES = ("child",)
+
+
+def _subtree_ids(conn, root: str, depth: int, rel_types: List[str]) -> List[int]:
+    """root'tan depth seviyeye kadar (kenarları genişletilecek) sınıf id'leri.
+    Seviye seviye SQL ile gezilir; her id bir kez (döngüler / ortak alt ağaçlar)."""
+    row = conn.execute("SELECT id FROM classes WHERE name = ?;", (root,)).fetchone()
+    if row is None:
+        return []
+    seen = {row[0]}
+    frontier = [row[0]]
+    marks = ",".join("?" * len(rel_types))
+    for _ in range(depth - 1):
+        if not frontier:
+            break
+        nxt = [r[0] for r in conn.execute(f"""
+            SELECT DISTINCT dst_class_id FROM relations
+            WHERE src_class_id IN (SELECT value FROM json_each(?)) AND rel_type IN ({marks})
+              AND dst_class_id IS NOT NULL;
+        """, (json.dumps(frontier), *rel_types)) if r[0] not in seen]
+        seen.update(nxt)
+        frontier = nxt
+    return sorted(seen)
+
+
+def _filters(conn, rel_types: Optional[Iterable[str]], packages: Optional[Iterable[str]], root: Optional[str],
+             depth: int) -> Tuple[str, list]:
+    """(WHERE, parametreler). Paket: 'fv' tam paket, 'fv*' önek (fv, fvns, ...)."""
+    where, args = ["1"], []
+    rel_types = list(rel_types or [])
+    if root and not rel_types:
+        rel_types = list(SUBTREE_REL_TYPES)
+    if rel_types:
+        where.append(f"r.rel_type IN ({','.join('?' * len(rel_types))})")
+        args += rel_types
+    pkg = []
+    for p in packages or []:
+        if p.endswith("*"):
+            pkg.append("s.module LIKE ?"); args.append(_MODULE_PREFIX + p[:-1] + "%")
+        else:
+            pkg.append("(s.module = ? OR s.module LIKE ?)"); args += [_MODULE_PREFIX + p, _MODULE_PREFIX + p + ".%"]
+    if pkg:
+        where.append("(" + " OR ".join(pkg) + ")")
+    if root:
+        where.append("r.src_class_id IN (SELECT value FROM json_each(?))")
+        args.append(json.dumps(_subtree_ids(conn, root, depth, rel_types)))
+    return " AND ".join(where), args
+
+
+def _edges(conn, where: str, args: list):
+    return conn.execute(f"""
+        SELECT s.name, COALESCE(d.name, r.dst_name), r.rel_type
+        FROM relations r
+        JOIN classes s ON s.id = r.src_class_id
+        LEFT JOIN classes d ON d.id = r.dst_class_id
+        WHERE {where} AND COALESCE(d.name, r.dst_name) IS NOT NULL
+        ORDER BY r.id;
+    """, args)
+
+
+def _nodes(conn, where: str, args: list):
+    # WHERE iki kez geçiyor: parametreleri de iki kez bağla
+    return conn.execute(f"""
+        SELECT name FROM (
+            SELECT s.name AS name FROM relations r JOIN classes s ON s.id = r.src_class_id
+            LEFT JOIN classes d ON d.id = r.dst_class_id
+            WHERE {where} AND COALESCE(d.name, r.dst_name) IS NOT NULL
+            UNION
+            SELECT COALESCE(d.name, r.dst_name) FROM relations r JOIN classes s ON s.id = r.src_class_id
+            LEFT JOIN classes d ON d.id = r.dst_class_id
+            WHERE {where} AND COALESCE(d.name, r.dst_name) IS NOT NULL
+        ) ORDER BY name;
+    """, args + args)
+
+
+_MERMAID_ID = re.compile(r"[^A-Za-z0-9_]")
+
+
+def _mermaid(conn, out: TextIO, where, args) -> Dict[str, int]:
+    out.write("graph LR\n")
+    n = 0
+    for src, dst, rt in _edges(conn, where, args):
+        # çözülmemiş hedefler (cobra.model.fv.X) Mermaid id'sinde nokta içeremez
+        out.write(f"  {_MERMAID_ID.sub('_', src)} -->|{rt}| {_MERMAID_ID.sub('_', dst)}\n")
+        n += 1
+    return {"edges": n}
+
+
+def _dot_id(name: str) -> str:
+    return '"' + name.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _dot(conn, out: TextIO, where, args) -> Dict[str, int]:
+    out.write("digraph spinode {\n  rankdir=LR;\n  node [shape=box];\n")
+    n = 0
+    for src, dst, rt in _edges(conn, where, args):
+        out.write(f"  {_dot_id(src)} -> {_dot_id(dst)} [label={_dot_id(rt or '')}];\n")
+        n += 1
+    out.write("}\n")
+    return {"edges": n}
+
+
+def _graphml(conn, out: TextIO, where, args) -> Dict[str, int]:
+    out.write(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        '  <key id="rel_type" for="edge" attr.name="rel_type" attr.type="string"/>\n'
+        '  <graph id="spinode" edgedefault="directed">\n'
+    )
+    nodes = edges = 0
+    # önce düğümler (GraphML kenarların düğümlere işaret etmesini ister), sonra kenarlar
+    for (name,) in _nodes(conn, where, args):
+        out.write(f"    <node id={quoteattr(name)}/>\n")
+        nodes += 1
+    for src, dst, rt in _edges(conn, where, args):
+        out.write(f'    <edge source={quoteattr(src)} target={quoteattr(dst)}>'
+                  f'<data key="rel_type">{escape(rt or "")}</data></edge>\n')
+        edges += 1
+    out.write("  </graph>\n</graphml>\n")
+    return {"nodes": nodes, "edges": edges}
+
+
+_WRITERS = {"mermaid": _mermaid, "dot": _dot, "graphml": _graphml}
+
+
+def export_graph(out, fmt: Optional[str] = None, rel_types: Optional[Iterable[str]] = None,
+                 packages: Optional[Iterable[str]] = None, root: Optional[str] = None,
+                 depth: int = SUBTREE_DEPTH) -> Dict[str, int]:
+    """İlişki grafını `out`'a (dosya yolu ya da yazılabilir metin akışı) akıt.
+    rel_types: child/parent/rs/rt süzgeci (alt ağaçta gezinme de bunlarla yapılır; boşsa child)
+    packages: kaynak sınıfın paketi ('fv' tam, 'fv*' önek)
+    root/depth: yalnızca root'tan depth seviyeye kadar ulaşılan sınıfların kenarları"""
+    if fmt is None:
+        fmt = format_for(out) if isinstance(out, (str, Path)) else "mermaid"
+    writer = _WRITERS[fmt]
+    conn = get_catalog_conn()
+    try:
+        where, args = _filters(conn, rel_types, packages, root, depth)
+        if isinstance(out, (str, Path)):
+            with open(out, "w", encoding="utf-8", buffering=1 << 20) as f:
+                return writer(conn, f, where, args)
+        return writer(conn, out, where, args)
+    finally:
+        conn.close()
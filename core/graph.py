@@ -0,0 +1,252 @@
+# core/graph.py
+"""relations tablosundan bir kez kurulan bellek içi ilişki grafı.
+
+Düğümler yoğun indekslerdir (0..n-1 sınıflar, sonrası çözülmemiş dst_name'ler).
+Her rel_type için ileri ve ters yönde CSR dizileri tutulur:
+    offsets[i] .. offsets[i+1]  →  targets içindeki komşular (ada göre sıralı)
+Böylece derin gezinmeler SQL'e gitmeden, düğüm başına bir dilimle yapılır.
+"""
+import logging, re, threading, time
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.db import catalog_stamp, get_catalog_conn, get_conn
+
+REL_TYPES = ("child", "parent", "rs", "rt")
+# DN zincirlerinde kök adayı sırası; ebeveyni olmayan diğer sınıflar bunlardan sonra
+ROOT_CLASSES = ("topRoot", "polUni")
+# başka süreçte yeniden yükleme kontrolü en sık bu aralıkla (bkz. meta_derived)
+GRAPH_STAMP_TTL = 5.0
+
+
+class RelGraph:
+    __slots__ = ("names", "index", "_fwd", "_rev")
+
+    def __init__(self, names: List[str], index: Dict[str, int],
+                 fwd: Dict[str, Tuple[array, array]], rev: Dict[str, Tuple[array, array]]):
+        self.names = names
+        self.index = index
+        self._fwd = fwd
+        self._rev = rev
+
+    @classmethod
+    def build(cls, conn) -> "RelGraph":
+        t0 = time.perf_counter()
+        names: List[str] = []
+        id_to_idx: Dict[int, int] = {}
+        for cid, name in conn.execute("SELECT id, name FROM classes ORDER BY id;"):
+            id_to_idx[cid] = len(names)
+            names.append(name)
+        index = {n: i for i, n in enumerate(names)}
+        edges: Dict[str, List[Tuple[int, int]]] = {}
+        for src, rel_type, dst_id, dst_name in conn.execute(
+            "SELECT src_class_id, rel_type, dst_class_id, dst_name FROM relations;"
+        ):
+            s = id_to_idx.get(src)
+            if s is None:
+                continue
+            d = id_to_idx.get(dst_id) if dst_id is not None else None
+            if d is None:
+                if not dst_name:
+                    continue
+                # çözülmemiş hedef: adıyla ayrı düğüm (neighbors_of eskiden de dst_name gösteriyordu)
+                d = index.get(dst_name)
+                if d is None:
+                    d = index[dst_name] = len(names)
+                    names.append(dst_name)
+            edges.setdefault(rel_type, []).append((s, d))
+        n = len(names)
+        fwd = {rt: _csr(n, pairs, names) for rt, pairs in edges.items()}
+        rev = {rt: _csr(n, [(d, s) for s, d in pairs], names) for rt, pairs in edges.items()}
+        logging.debug("relation graph: %d düğüm, %d kenar, %.0f ms", n,
+                      sum(len(p) for p in edges.values()), (time.perf_counter() - t0) * 1000)
+        return cls(names, index, fwd, rev)
+
+    def _types(self, rel_types: Optional[Iterable[str]], reverse: bool):
+        table = self._rev if reverse else self._fwd
+        keys = table.keys() if rel_types is None else [rt for rt in rel_types if rt in table]
+        return [(rt, table[rt]) for rt in keys]
+
+    def _adj(self, i: int, types) -> List[Tuple[str, int]]:
+        out = []
+        for rt, (offsets, targets) in types:
+            out.extend((rt, targets[k]) for k in range(offsets[i], offsets[i + 1]))
+        return out
+
+    def neighbors(self, name: str, rel_types: Optional[Iterable[str]] = None, reverse: bool = False) -> List[str]:
+        """Doğrudan komşular (ada göre sıralı). reverse: bu sınıfa işaret edenler."""
+        i = self.index.get(name)
+        if i is None:
+            return []
+        return sorted(self.names[d] for _, d in self._adj(i, self._types(rel_types, reverse)))
+
+    def edges(self, name: str, rel_types: Optional[Iterable[str]] = None,
+              reverse: bool = False) -> List[Tuple[str, str]]:
+        """Doğrudan kenarlar (rel_type, komşu), komşu adına göre sıralı."""
+        i = self.index.get(name)
+        if i is None:
+            return []
+        return sorted(((rt, self.names[d]) for rt, d in self._adj(i, self._types(rel_types, reverse))),
+                      key=lambda e: e[1])
+
+    def degree(self, name: str, rel_types: Optional[Iterable[str]] = None, reverse: bool = False) -> int:
+        i = self.index.get(name)
+        if i is None:
+            return 0
+        return sum(offsets[i + 1] - offsets[i] for _, (offsets, _) in self._types(rel_types, reverse))
+
+    def bfs(self, root: str, depth: int = 1, rel_types: Optional[Iterable[str]] = None,
+            reverse: bool = False, max_nodes: Optional[int] = None) -> List[Tuple[int, str, str, str]]:
+        """root'tan depth seviyeye kadar genişlik öncelikli gezinme.
+        Kenarları (seviye, kaynak, hedef, rel_type) olarak BFS sırasıyla döndürür. Her düğüm bir
+        kez genişletilir (döngü güvenli); zaten görülmüş düğüme giden kenar yine listelenir
+        ama o düğüm tekrar açılmaz. max_nodes aşılınca durur."""
+        start = self.index.get(root)
+        if start is None:
+            return []
+        types = self._types(rel_types, reverse)
+        seen = {start}
+        edges: List[Tuple[int, str, str, str]] = []
+        queue = deque([(start, 0)])
+        while queue:
+            i, level = queue.popleft()
+            if level >= depth:
+                continue
+            for rt, d in sorted(self._adj(i, types), key=lambda e: self.names[e[1]]):
+                edges.append((level + 1, self.names[i], self.names[d], rt))
+                if d in seen:
+                    continue
+                seen.add(d)
+                if max_nodes is not None and len(seen) >= max_nodes:
+                    return edges
+                queue.append((d, level + 1))
+        return edges
+
+    def containment(self, i: int) -> List[int]:
+        """i'nin containment çocukları: child kenarları + ters parent kenarları (tekilleştirilmiş)."""
+        kids = [d for _, d in self._adj(i, self._types(("child",), False) + self._types(("parent",), True))]
+        return sorted(set(kids), key=lambda d: self.names[d])
+
+    def has_container(self, i: int) -> bool:
+        return bool(self._adj(i, self._types(("child",), True) + self._types(("parent",), False)))
+
+    def subtree(self, root: str, depth: int = 1, rel_types: Optional[Iterable[str]] = None,
+                reverse: bool = False, max_nodes: Optional[int] = None) -> Dict[str, List[str]]:
+        """bfs çıktısından kaynak → hedefler haritası (çizim için)."""
+        tree: Dict[str, List[str]] = {}
+        for _, src, dst, _ in self.bfs(root, depth, rel_types, reverse, max_nodes):
+            tree.setdefault(src, []).append(dst)
+        return tree
+
+
+def _csr(n: int, pairs: List[Tuple[int, int]], names: List[str]) -> Tuple[array, array]:
+    pairs.sort(key=lambda p: (p[0], names[p[1]]))
+    offsets = array("i", bytes(4 * (n + 1)))
+    for s, _ in pairs:
+        offsets[s + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    return offsets, array("i", (d for _, d in pairs))
+
+
+_lock = threading.Lock()
+_graph: Optional[RelGraph] = None
+_stamp = None
+_checked = 0.0
+
+
+def get_graph() -> RelGraph:
+    """Önbellekli graf; ilk çağrıda kurulur, MIM yeniden yüklenince yeniden kurulur."""
+    global _graph, _stamp, _checked
+    with _lock:
+        now = time.monotonic()
+        if _graph is not None and now - _checked < GRAPH_STAMP_TTL:
+            return _graph
+        _checked = now
+        stamp = catalog_stamp()
+        if _graph is None or stamp != _stamp:
+            conn = get_catalog_conn()
+            try:
+                _graph = RelGraph.build(conn)
+            finally:
+                conn.close()
+            _stamp = stamp
+        return _graph
+
+
+def invalidate_graph():
+    global _graph
+    with _lock:
+        _graph = None
+
+
+# ---- DN zincirleri (yükleme anında)
+_RN_FIELD = re.compile(r"%\((\w+)\)s")
+
+
+def rn_template(rn_format: Optional[str]) -> str:
+    """cobra rnFormat'ı ('tn-%(name)s') okunur şablona ('tn-{name}') çevir."""
+    return _RN_FIELD.sub(r"{\1}", rn_format or "")
+
+
+def materialize_dn_paths() -> int:
+    """Her sınıf için kökten en kısa containment zincirini ve DN şablonunu class_dn_paths'e yaz.
+    Önce ROOT_CLASSES'tan, sonra kalanlar için ebeveyni olmayan sınıflardan çok kaynaklı BFS;
+    her sınıf ilk ulaşıldığı (en kısa) zinciri alır. Yazılan satır sayısını döndürür."""
+    conn = get_conn()
+    try:
+        g = RelGraph.build(conn)
+        rows = conn.execute("SELECT id, rn_format FROM classes ORDER BY id;").fetchall()
+        n = len(rows)  # RelGraph.build ile aynı sıra: indeks i == rows[i]
+        known = [g.index[r] for r in ROOT_CLASSES if r in g.index and g.index[r] < n]
+        orphans = sorted((i for i in range(n) if i not in known and not g.has_container(i)), key=lambda i: g.names[i])
+        prev: Dict[int, int] = {}
+        root_of: Dict[int, int] = {}
+        depth: Dict[int, int] = {}
+        # bilinen kökler sırayla (topRoot varsa polUni onun altından gelir), sonra
+        # onlardan ulaşılamayanlar için ebeveynsiz sınıflar
+        for roots in [[r] for r in known] + [orphans]:
+            queue = deque()
+            for r in roots:
+                if r not in depth:
+                    depth[r], root_of[r] = 0, r
+                    queue.append(r)
+            while queue:
+                i = queue.popleft()
+                for d in g.containment(i):
+                    if d < n and d not in depth:
+                        depth[d], root_of[d], prev[d] = depth[i] + 1, root_of[i], i
+                        queue.append(d)
+
+        out = []
+        for i in sorted(depth):
+            chain = [i]
+            while chain[-1] in prev:
+                chain.append(prev[chain[-1]])
+            chain.reverse()
+            rns = [rn_template(rows[c][1]) for c in chain]
+            out.append((rows[i][0], rows[root_of[i]][0], depth[i], "/".join(g.names[c] for c in chain),
+                        "/".join(rn for rn in rns if rn)))
+        conn.execute("DELETE FROM class_dn_paths;")
+        conn.executemany(
+            "INSERT INTO class_dn_paths(class_id, root_id, depth, chain, dn_template) VALUES (?,?,?,?,?);", out)
+        conn.commit()
+    finally:
+        conn.close()
+    return len(out)
+
+
+def dn_path(class_name: str) -> Optional[Dict]:
+    """Kökten sınıfa zincir ve DN şablonu; zincir bilinmiyorsa None."""
+    conn = get_catalog_conn()
+    try:
+        row = conn.execute("""
+            SELECT d.depth, d.chain, d.dn_template FROM class_dn_paths d
+            JOIN classes c ON c.id = d.class_id WHERE c.name = ?
+        """, (class_name,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return {"depth": row[0], "chain": row[1].split("/"), "dn_template": row[2]}
@@ -1,38 +1,200 @@
 # core/meta_derived.py
-from typing import List, Dict, Any
-from core.db import get_conn
+import json, threading, time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from core.db import catalog_stamp, get_catalog_conn, get_conn
+
+# ClassMeta önbelleği: en fazla bu kadar sınıf / toplam prop tutulur (LRU)
+META_CACHE_SIZE = 256
+META_CACHE_PROPS = 50000
+# MIM başka bir süreçte yeniden yüklenmiş mi? (mim_modules damgası) en sık bu aralıkla bakılır
+META_STAMP_TTL = 5.0
+
+
+class ClassMeta:
+    """Bir sınıfın Builder/şablon türetimi için gereken metası (salt-okunur).
+    props: (name, is_naming, ptype, regex) — is_naming DESC, name sıralı
+    enums: prop adı → ((const_name, const_label, const_value), ...)
+    relations: (rel_type, dst) — dst çözülmüşse sınıf adı, değilse dst_name
+    templates: (kind, title, conds_json, pipes_json); pipeline: (opt_id, label) — materialize() çıktısı
+    dn_template: kökten DN şablonu (core.graph.materialize_dn_paths)"""
+    __slots__ = ("id", "name", "rn_format", "naming_props", "props", "enums", "relations", "templates", "pipeline",
+                 "descr", "dn_template")
+
+    def __init__(self, id: int, name: str, rn_format: Optional[str], naming_props: Tuple[str, ...],
+                 props: Tuple[tuple, ...], enums: Dict[str, Tuple[tuple, ...]], relations: Tuple[tuple, ...],
+                 templates: Tuple[tuple, ...] = (), pipeline: Tuple[tuple, ...] = (), descr: Optional[str] = None,
+                 dn_template: Optional[str] = None):
+        self.id = id
+        self.name = name
+        self.rn_format = rn_format
+        self.naming_props = naming_props
+        self.props = props
+        self.enums = enums
+        self.relations = relations
+        self.templates = templates
+        self.pipeline = pipeline
+        self.descr = descr
+        self.dn_template = dn_template
+
+    def prop_names(self) -> set:
+        return {p[0] for p in self.props}
+
+
+def _load_class_meta(class_name: str) -> Optional[ClassMeta]:
+    conn = get_catalog_conn(); cur = conn.cursor()
+    try:
+        row = cur.execute("SELECT id, rn_format, naming_props_csv, descr FROM classes WHERE name = ?", (class_name,)).fetchone()
+        if row is None:
+            return None
+        cid = row[0]
+        props = tuple(
+            (r[0], bool(r[1]), r[2], r[3]) for r in cur.execute("""
+                SELECT name, is_naming, ptype, regex FROM props
+                WHERE class_id = ?
+                ORDER BY is_naming DESC, name
+            """, (cid,))
+        )
+        enums: Dict[str, list] = {}
+        for prop_name, cname, clabel, cval in cur.execute(
+            "SELECT prop_name, const_name, const_label, const_value FROM prop_enums WHERE class_id = ? ORDER BY id",
+            (cid,),
+        ):
+            enums.setdefault(prop_name, []).append((cname, clabel, cval))
+        relations = tuple(
+            (r[0], r[1]) for r in cur.execute("""
+                SELECT r.rel_type, COALESCE(c2.name, r.dst_name)
+                FROM relations r LEFT JOIN classes c2 ON c2.id = r.dst_class_id
+                WHERE r.src_class_id = ?
+                ORDER BY r.id
+            """, (cid,))
+        )
+        templates = tuple(tuple(r) for r in cur.execute(
+            "SELECT kind, title, conds, pipes FROM class_templates WHERE class_id = ? ORDER BY pos", (cid,)))
+        pipeline = tuple(tuple(r) for r in cur.execute(
+            "SELECT opt_id, label FROM class_pipeline_options WHERE class_id = ? ORDER BY pos", (cid,)))
+        dn = cur.execute("SELECT dn_template FROM class_dn_paths WHERE class_id = ?", (cid,)).fetchone()
+    finally:
+        conn.close()
+    naming = tuple(n for n in (row[2] or "").split(",") if n)
+    return ClassMeta(cid, class_name, row[1], naming, props, {k: tuple(v) for k, v in enums.items()}, relations,
+                     templates, pipeline, row[3], dn[0] if dn else None)
+
+
+class _MetaCache:
+    def __init__(self, maxsize: int, max_props: int):
+        self.maxsize = maxsize
+        self.max_props = max_props
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Optional[ClassMeta]]" = OrderedDict()
+        self._props = 0
+        self._stamp = None
+        self._checked = 0.0
+        self.hits = self.misses = 0
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._props = 0
+            self._stamp = None
+            self._checked = 0.0
+
+    def _check_stamp(self):
+        now = time.monotonic()
+        if now - self._checked < META_STAMP_TTL:
+            return
+        self._checked = now
+        stamp = catalog_stamp()
+        with self._lock:
+            if self._stamp is not None and stamp != self._stamp:
+                self._data.clear()
+                self._props = 0
+            self._stamp = stamp
+
+    def peek(self, class_name: str) -> Optional[ClassMeta]:
+        with self._lock:
+            return self._data.get(class_name)
+
+    def get(self, class_name: str) -> Optional[ClassMeta]:
+        self._check_stamp()
+        with self._lock:
+            if class_name in self._data:
+                self._data.move_to_end(class_name)
+                self.hits += 1
+                return self._data[class_name]
+        meta = _load_class_meta(class_name)
+        with self._lock:
+            self.misses += 1
+            if class_name not in self._data:
+                self._data[class_name] = meta
+                self._props += len(meta.props) if meta else 0
+            while len(self._data) > self.maxsize or (self._props > self.max_props and len(self._data) > 1):
+                _, old = self._data.popitem(last=False)
+                self._props -= len(old.props) if old else 0
+        return meta
+
+
+_cache = _MetaCache(META_CACHE_SIZE, META_CACHE_PROPS)
+
+
+def get_class_meta(class_name: str) -> Optional[ClassMeta]:
+    """Önbellekli ClassMeta; sınıf yoksa None."""
+    return _cache.get(class_name)
+
+
+def cached_class_meta(class_name: str) -> Optional[ClassMeta]:
+    """Yalnızca önbellekte varsa döndür; DB'ye gitmez (UI thread'i için)."""
+    return _cache.peek(class_name)
+
+
+def invalidate_class_meta():
+    """MIM yeniden yüklendiğinde / snapshot alındığında önbelleği boşalt."""
+    _cache.clear()
+
 
 def get_prop_info(class_name: str) -> List[Dict[str, Any]]:
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute("""
-        SELECT p.name, p.is_naming, p.ptype, p.regex
-        FROM props p
-        JOIN classes c ON c.id = p.class_id
-        WHERE c.name = ?
-        ORDER BY p.is_naming DESC, p.name
-    """, (class_name,))
-    props = [dict(name=r[0], is_naming=bool(r[1]), ptype=r[2], regex=r[3]) for r in cur.fetchall()]
-
-    # enums
-    enums_map: Dict[str, List[Dict[str,str]]] = {}
-    cur.execute("""
-        SELECT p.prop_name, p.const_name, p.const_label, p.const_value
-        FROM prop_enums p
-        JOIN classes c ON c.id = p.class_id
-        WHERE c.name = ?
-    """, (class_name,))
-    for prop_name, cname, clabel, cval in cur.fetchall():
-        enums_map.setdefault(prop_name, []).append({"name": cname, "label": clabel, "value": cval})
-
-    for pr in props:
-        pr["enums"] = enums_map.get(pr["name"], [])
-    conn.close()
-    return props
+    meta = get_class_meta(class_name)
+    if meta is None:
+        return []
+    return [
+        dict(name=name, is_naming=is_naming, ptype=ptype, regex=regex,
+             enums=[{"name": c, "label": l, "value": v} for c, l, v in meta.enums.get(name, ())])
+        for name, is_naming, ptype, regex in meta.props
+    ]
+
+def get_pipeline_options(class_name: str) -> List[Dict[str, str]]:
+    """Yüklemede türetilmiş pipeline seçenekleri; tablo boşsa (materialize çalışmamış) heuristik."""
+    meta = get_class_meta(class_name)
+    if meta is None or not meta.pipeline:
+        return derive_pipeline_options(class_name)
+    return [{"id": i, "label": label} for i, label in meta.pipeline]
+
+
+def get_templates(class_name: str) -> List[Dict[str, Any]]:
+    """Yüklemede türetilmiş şablonlar; tablo boşsa heuristik."""
+    meta = get_class_meta(class_name)
+    if meta is None or not meta.pipeline:
+        return derive_templates(class_name)
+    return [{"title": title, "kind": kind, "conds": json.loads(conds), "pipes": json.loads(pipes)}
+            for kind, title, conds, pipes in meta.templates]
+
+
+def classes_with_template(kind: str) -> List[str]:
+    """Belirli türde şablon sunan sınıflar (ör. 'encap': VLAN encap filtresi olanlar)."""
+    conn = get_catalog_conn()
+    try:
+        return [r[0] for r in conn.execute("""
+            SELECT c.name FROM class_templates t JOIN classes c ON c.id = t.class_id
+            WHERE t.kind = ? ORDER BY c.name
+        """, (kind,))]
+    finally:
+        conn.close()
+
 
 def derive_pipeline_options(class_name: str) -> List[Dict[str, str]]:
     """Sınıfa göre otomatik pipeline (grep/sort/uniq) seçenekleri."""
-    props = get_prop_info(class_name)
-    names = {p["name"] for p in props}
+    meta = get_class_meta(class_name)
+    names = meta.prop_names() if meta else set()
     out: List[Dict[str,str]] = []
 
     # dn varsa dn için grep
@@ -51,8 +213,8 @@ def derive_pipeline_options(class_name: str) -> List[Dict[str, str]]:
 
 def derive_templates(class_name: str) -> List[Dict[str, Any]]:
     """Heuristik: isim, alias, descr, enum'lu prop'lar, encap gibi alanlara göre öneriler."""
-    props = get_prop_info(class_name)
-    names = {p["name"] for p in props}
+    meta = get_class_meta(class_name)
+    names = meta.prop_names() if meta else set()
     t: List[Dict[str, Any]] = []
 
     # Alias regex
@@ -77,13 +239,14 @@ def derive_templates(class_name: str) -> List[Dict[str, Any]]:
             "pipes": []
         })
     # Enums: ilk enum'lu prop için IN örneği
-    for p in props:
-        if p["enums"]:
-            sample = ",".join([e["name"] for e in p["enums"][:3]]) or ""
+    for pname, *_ in (meta.props if meta else ()):
+        consts = meta.enums.get(pname)
+        if consts:
+            sample = ",".join([c[0] for c in consts[:3]]) or ""
             if sample:
                 t.append({
-                    "title": f"{p['name']} in (enum)",
-                    "conds": [{"prop": p["name"], "op": "in", "value": sample}],
+                    "title": f"{pname} in (enum)",
+                    "conds": [{"prop": pname, "op": "in", "value": sample}],
                     "pipes": []
                 })
             break
@@ -98,3 +261,105 @@ def derive_templates(class_name: str) -> List[Dict[str, Any]]:
             break
 
     return t
+
+
+# ---- yükleme anı türetimi (materialize)
+# derive_pipeline_options / derive_templates ile aynı kurallar; her kural tüm sınıflar
+# için tek INSERT ... SELECT olarak çalışır.
+
+# (id, label, tetikleyen prop'lar — boşsa her sınıf)
+PIPELINE_RULES = (
+    ("grep:^dn", 'grep "^dn"', ("dn",)),
+    ("grep:^name", 'grep "^name "', ("name", "nameAlias")),
+    ("grep:bgp", 'grep "operSt\\|lastFlapTs"', ("operSt", "lastFlapTs")),
+    ("sortu", "sort -u", ()),
+    ("uniq", "uniq", ()),
+)
+
+# (kind, title, aday prop'lar — öncelik sırasıyla, op, örnek değer, pipes)
+# "enum_in" özel: ilk enum'lu prop, ilk 3 sabit
+TEMPLATE_RULES = (
+    ("alias_regex", "Alias regex (ID listesi)", ("nameAlias",), "regex", "(123|456|789)", ["grep:^name", "sortu"]),
+    ("name_prefix", "Name prefix", ("name",), "startswith", "OUT-", ["grep:^name"]),
+    ("descr_contains", "Description contains", ("descr",), "contains", "DMZ", []),
+    ("enum_in", None, (), "in", None, []),
+    ("encap", "VLAN encap contains", ("encap", "vlan", "encapId"), "contains", "vlan-905", []),
+)
+TEMPLATE_KINDS = tuple(r[0] for r in TEMPLATE_RULES)
+
+
+def _first_prop_sql(cands: Tuple[str, ...]) -> str:
+    order = " ".join(f"WHEN '{n}' THEN {i}" for i, n in enumerate(cands))
+    names = ",".join(f"'{n}'" for n in cands)
+    return (f"(SELECT p.name FROM props p WHERE p.class_id = c.id AND p.name IN ({names}) "
+            f"ORDER BY CASE p.name {order} END LIMIT 1)")
+
+
+def materialize(class_ids=None) -> Dict[str, int]:
+    """Şablon ve pipeline seçeneklerini tablolara yaz. class_ids verilirse yalnızca
+    o sınıflar (artımlı yükleme), verilmezse tüm katalog."""
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        if class_ids is not None:
+            class_ids = list(class_ids)
+            # kataloğun çoğu değiştiyse kapsam tablosu olmadan baştan kurmak daha ucuz
+            if len(class_ids) * 2 >= cur.execute("SELECT COUNT(*) FROM classes;").fetchone()[0]:
+                class_ids = None
+        if class_ids is None:
+            scope = ""
+            cur.execute("DELETE FROM class_templates;")
+            cur.execute("DELETE FROM class_pipeline_options;")
+        else:
+            cur.execute("CREATE TEMP TABLE IF NOT EXISTS _mat_scope (id INTEGER PRIMARY KEY);")
+            cur.execute("DELETE FROM _mat_scope;")
+            cur.executemany("INSERT OR IGNORE INTO _mat_scope(id) VALUES (?);", [(i,) for i in class_ids])
+            scope = "AND c.id IN (SELECT id FROM temp._mat_scope)"
+            cur.execute("DELETE FROM class_templates WHERE class_id IN (SELECT id FROM temp._mat_scope);")
+            cur.execute("DELETE FROM class_pipeline_options WHERE class_id IN (SELECT id FROM temp._mat_scope);")
+
+        for pos, (opt_id, label, cands) in enumerate(PIPELINE_RULES):
+            cond = f"AND {_first_prop_sql(cands)} IS NOT NULL" if cands else ""
+            cur.execute(f"""
+                INSERT INTO class_pipeline_options(class_id, pos, opt_id, label)
+                SELECT c.id, ?, ?, ? FROM classes c WHERE 1 {cond} {scope};
+            """, (pos, opt_id, label))
+
+        for pos, (kind, title, cands, op, value, pipes) in enumerate(TEMPLATE_RULES):
+            if kind == "enum_in":
+                # ilk enum'lu prop (props sırası: is_naming DESC, name) ve ilk 3 sabiti
+                cur.execute(f"""
+                    INSERT INTO class_templates(class_id, kind, pos, title, conds, pipes)
+                    SELECT class_id, ?, ?, prop || ' in (enum)',
+                           json_array(json_object('prop', prop, 'op', ?, 'value', sample)), ?
+                    FROM (
+                        SELECT class_id, prop,
+                               (SELECT GROUP_CONCAT(const_name, ',') FROM (
+                                    SELECT e.const_name FROM prop_enums e
+                                    WHERE e.class_id = ep.class_id AND e.prop_name = ep.prop AND e.const_name IS NOT NULL
+                                    ORDER BY e.id LIMIT 3)) AS sample
+                        FROM (
+                            SELECT c.id AS class_id,
+                                   (SELECT p.name FROM props p
+                                    WHERE p.class_id = c.id
+                                      AND EXISTS (SELECT 1 FROM prop_enums e WHERE e.class_id = c.id AND e.prop_name = p.name)
+                                    ORDER BY p.is_naming DESC, p.name LIMIT 1) AS prop
+                            FROM classes c WHERE 1 {scope}
+                        ) ep WHERE prop IS NOT NULL
+                    ) WHERE sample <> '';
+                """, (kind, pos, op, json.dumps(pipes)))
+                continue
+            cur.execute(f"""
+                INSERT INTO class_templates(class_id, kind, pos, title, conds, pipes)
+                SELECT class_id, ?, ?, ?, json_array(json_object('prop', prop, 'op', ?, 'value', ?)), ?
+                FROM (SELECT c.id AS class_id, {_first_prop_sql(cands)} AS prop FROM classes c WHERE 1 {scope})
+                WHERE prop IS NOT NULL;
+            """, (kind, pos, title, op, value, json.dumps(pipes)))
+        conn.commit()
+        counts = {
+            "templates": cur.execute("SELECT COUNT(*) FROM class_templates;").fetchone()[0],
+            "pipeline_options": cur.execute("SELECT COUNT(*) FROM class_pipeline_options;").fetchone()[0],
+        }
+    finally:
+        conn.close()
+    invalidate_class_meta()
+    return counts
@@ -0,0 +1,141 @@
+# core/mim_ast.py
+"""modelimpl kaynaklarını import etmeden (ast ile) okuyan çıkarım backend'i.
+
+Sınıf gövdesindeki basit meta/prop atamaları (ClassMeta, PropMeta, _addConstant,
+childClasses.add, namingProps.append ...) cobra.mit.meta nesneleri üzerinde
+yeniden oynatılır; modül kodu çalıştırılmaz. Ortaya çıkan meta nesneleri import
+yolu ile aynı `_extract_class` fonksiyonundan geçer, böylece katalog birebir aynıdır.
+`cobra.model.fv.BD` gibi sınıf referansları import edilmez, moClassName'e ('fvBD')
+çevrilir. Çözülemeyen ifadeler atlanır ve log'a yazılır.
+"""
+import ast, importlib, logging
+
+# yalnızca bu modüllerden gelen isimler çözümlenir (küçük SDK modülleri)
+_ALLOWED_MODULES = ("cobra.mit.meta", "cobra.model.category")
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _dotted(node) -> str | None:
+    """a.b.c zinciri → 'a.b.c'; zincir bir Name'de bitmiyorsa None."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _module_env(tree: ast.Module) -> dict:
+    env = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ImportFrom) or node.module not in _ALLOWED_MODULES:
+            continue
+        try:
+            mod = importlib.import_module(node.module)
+        except Exception:
+            continue
+        for alias in node.names:
+            obj = getattr(mod, alias.name, None)
+            if obj is not None:
+                env[alias.asname or alias.name] = obj
+    return env
+
+
+def _eval(node, env):
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.List):
+        return [_eval(e, env) for e in node.elts]
+    if isinstance(node, ast.Tuple):
+        return tuple(_eval(e, env) for e in node.elts)
+    if isinstance(node, ast.Set):
+        return {_eval(e, env) for e in node.elts}
+    if isinstance(node, ast.Dict):
+        return {_eval(k, env): _eval(v, env) for k, v in zip(node.keys, node.values)}
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return -_eval(node.operand, env)
+    if isinstance(node, ast.Name):
+        if node.id in env:
+            return env[node.id]
+        raise _Unsupported(node.id)
+    if isinstance(node, ast.Attribute):
+        if node.attr.startswith("__"):
+            raise _Unsupported(node.attr)
+        dotted = _dotted(node)
+        if dotted is not None and dotted.split(".", 1)[0] not in env:
+            # cobra.model.<paket>.<Sınıf>: import yolundaki sınıfın moClassName'i
+            parts = dotted.split(".")
+            if len(parts) == 4 and parts[:2] == ["cobra", "model"]:
+                from core.mim_loader import _dst_mo_name
+                return _dst_mo_name(dotted)
+            raise _Unsupported(dotted)
+        try:
+            return getattr(_eval(node.value, env), node.attr)
+        except AttributeError as e:
+            raise _Unsupported(node.attr) from e
+    if isinstance(node, ast.Call):
+        args = [_eval(a, env) for a in node.args]
+        kwargs = {k.arg: _eval(k.value, env) for k in node.keywords if k.arg}
+        if isinstance(node.func, ast.Name) and node.func.id == "getattr":
+            if len(args) < 2 or not isinstance(args[1], str) or args[1].startswith("__"):
+                raise _Unsupported("getattr")
+            return getattr(*args)
+        func = _eval(node.func, env)
+        if not callable(func):
+            raise _Unsupported("call")
+        return func(*args, **kwargs)
+    raise _Unsupported(type(node).__name__)
+
+
+def _assign(target, value, env):
+    if isinstance(target, ast.Name):
+        env[target.id] = value
+    elif isinstance(target, ast.Attribute) and not target.attr.startswith("__"):
+        setattr(_eval(target.value, env), target.attr, value)
+    elif isinstance(target, ast.Subscript):
+        _eval(target.value, env)[_eval(target.slice, env)] = value
+    else:
+        raise _Unsupported(type(target).__name__)
+
+
+def _run_class_body(cls: ast.ClassDef, env: dict, modname: str = ""):
+    """Sınıf gövdesini yeniden oynat; desteklenmeyen ifadeler atlanır (log'a yazılır)."""
+    for stmt in cls.body:
+        try:
+            if isinstance(stmt, ast.Assign):
+                value = _eval(stmt.value, env)
+                for target in stmt.targets:
+                    _assign(target, value, env)
+            elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+                _eval(stmt.value, env)
+        except Exception as e:
+            logging.info("ast skip %s.%s line %s: %s (%s: %s)", modname, cls.name, stmt.lineno,
+                         ast.unparse(stmt)[:120], type(e).__name__, e)
+    return env.get("meta")
+
+
+def extract_source(modname: str, path: str) -> list[dict] | None:
+    """Kaynak dosyadan MO sınıf kayıtlarını çıkar (extract_module ile aynı biçim).
+    Dosya okunamaz/parse edilemezse None döner."""
+    from core.mim_loader import _extract_class
+
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError) as e:
+        logging.warning("parse fail %s: %s", modname, e)
+        return None
+    env = _module_env(tree)
+    out = []
+    # inspect.getmembers ile aynı sıra: sınıf adına göre
+    for cls in sorted((n for n in tree.body if isinstance(n, ast.ClassDef)), key=lambda n: n.name):
+        meta = _run_class_body(cls, dict(env), modname)
+        if meta is None or not getattr(meta, "moClassName", None):
+            continue
+        out.append(_extract_class(modname, meta))
+    return out
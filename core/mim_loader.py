@@ -1,17 +1,59 @@
-import pkgutil, importlib, inspect, logging
-from core.db import get_conn, init_db, rebuild_fts
+import pkgutil, importlib, inspect, logging, time, hashlib, os, sys, gc, sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from core.db import get_conn, init_db, refresh_memory_catalog, sync_fts
+from core.meta_derived import invalidate_class_meta, materialize
+from core.graph import invalidate_graph, materialize_dn_paths
+
+def _impl():
+    # cobra yalnızca MIM yüklerken gerekli; snapshot/resolve gibi yollar onsuz çalışır
+    try:
+        import cobra.modelimpl as impl
+    except Exception as e:
+        raise RuntimeError("Cobra SDK (cobra) kurulu mu? 'pip install cobra' ") from e
+    return impl
 
-try:
-    import cobra.modelimpl as impl
-except Exception as e:
-    raise RuntimeError("Cobra SDK (cobra) kurulu mu? 'pip install cobra' ") from e
 
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
 
+def _walk_sources(path: str, prefix: str):
+    # walk_packages ile aynı sıra, ama paketleri import etmeden (dosya sisteminden)
+    for mi in pkgutil.iter_modules([path], prefix):
+        sub = os.path.join(path, mi.name.rsplit(".", 1)[1])
+        if mi.ispkg:
+            yield mi.name, os.path.join(sub, "__init__.py")
+            yield from _walk_sources(sub, mi.name + ".")
+        else:
+            yield mi.name, sub + ".py"
+
+
+def iter_modelimpl_sources():
+    """(modül adı, kaynak dosya yolu) çiftleri."""
+    impl = _impl()
+    for path in impl.__path__:
+        yield from _walk_sources(path, impl.__name__ + ".")
+
+
 def iter_modelimpl_modules():
-    for mi in pkgutil.walk_packages(impl.__path__, impl.__name__ + "."):
-        yield mi.name
+    for name, _ in iter_modelimpl_sources():
+        yield name
+
+
+def model_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version("acimodel")
+    except Exception:
+        return getattr(_impl(), "__version__", None) or "unknown"
+
+
+def _file_hash(path: str) -> str | None:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
 
 
 def _prop_name(pmeta) -> str:
@@ -114,126 +156,490 @@ def _iter_props(meta):
     return out
 
 
-def load_all():
-    init_db()
-    conn = get_conn(); cur = conn.cursor()
+def _regex_str(regex):
+    # bazı sürümlerde regex liste olarak gelir: ['[a-z]+']
+    if regex is None or isinstance(regex, str):
+        return regex
+    if isinstance(regex, (list, tuple)):
+        parts = [str(r) for r in regex if r]
+        return "|".join(parts) if parts else None
+    return str(regex)
 
-    # mevcut class isimleri
-    cur.execute("SELECT name, id FROM classes;")
-    existing = {r[0]: r[1] for r in cur.fetchall()}
 
-    # 1) classes & props & relations(dst_name)
-    for modname in iter_modelimpl_modules():
+def _extract_class(modname: str, meta) -> dict:
+    """Tek bir ClassMeta'dan DB'ye yazılacak satırları çıkar (DB'ye dokunmaz)."""
+    naming_props = []
+    for p in getattr(meta, "namingProps", []) or []:
+        pn = _prop_name(p)
+        if pn:
+            naming_props.append(pn)
+
+    props, enums = [], []
+    for pname, pmeta in _iter_props(meta):
+        props.append((
+            pname,
+            getattr(pmeta, "descr", None),
+            1 if getattr(pmeta, "isNaming", False) else 0,
+            1 if getattr(pmeta, "isConfig", False) else 0,
+            str(getattr(pmeta, "category", "")),  # PropCategory.* metni
+            _regex_str(getattr(pmeta, "regex", None)),
+        ))
+        # enum sabitleri
+        for cname, clabel, cval in _iter_constants(pmeta):
+            enums.append((pname, cname, clabel, cval))
+
+    dpaths = []
+    for dpath in getattr(meta, "deploymentQueryPaths", []) or []:
         try:
-            mod = importlib.import_module(modname)
-        except Exception as e:
-            logging.warning("import fail %s: %s", modname, e)
+            dname = getattr(dpath, "name", None) or str(dpath)
+            ddescr = getattr(dpath, "descr", None) or ""
+            target = getattr(dpath, "targetClass", None)
+            # Hedef moClassName'ı çıkar
+            if target and hasattr(target, "meta") and getattr(target.meta, "moClassName", None):
+                target = target.meta.moClassName
+            elif isinstance(target, str):
+                # "cobra.model.nw.If" -> "If"
+                parts = target.split(".")
+                target = parts[-1] if parts else target
+            dpaths.append((str(dname), str(ddescr), str(target) if target else None))
+        except Exception:
+            continue
+
+    rels = []
+    for rel_type, collection in (
+        ("child", getattr(meta, "childClasses", []) or []),
+        ("parent", getattr(meta, "parentClasses", []) or []),
+        ("rs", getattr(meta, "targetRelations", []) or []),
+        ("rt", getattr(meta, "sourceRelations", []) or []),
+    ):
+        for dst in _iter_rel_names(collection):
+            if dst:
+                rels.append((rel_type, str(dst)))
+
+    return {
+        "module": modname,
+        "name": meta.moClassName,
+        "label": getattr(meta, "label", None),
+        "category": str(getattr(meta, "category", "")),
+        "rn_format": getattr(meta, "rnFormat", None),
+        "naming_props_csv": ",".join(naming_props) if naming_props else None,
+        "descr": getattr(meta, "descr", None),
+        "props": props,
+        "enums": enums,
+        "dpaths": dpaths,
+        "relations": rels,
+    }
+
+
+def extract_module(modname: str) -> list[dict] | None:
+    """Modülü import et ve içinde tanımlı MO sınıflarının kayıtlarını döndür.
+    Import başarısızsa None döner."""
+    try:
+        mod = importlib.import_module(modname)
+    except Exception as e:
+        logging.warning("import fail %s: %s", modname, e)
+        return None
+    out = []
+    for _, obj in inspect.getmembers(mod, inspect.isclass):
+        # başka modülden import edilen sınıfları atla (tekrar yazılmasın)
+        if getattr(obj, "__module__", None) != modname:
             continue
+        meta = getattr(obj, "meta", None)
+        if not meta or not getattr(meta, "moClassName", None):
+            continue
+        out.append(_extract_class(modname, meta))
+    return out
+
+
+def _extract_one(modname: str, path: str, backend: str = "import") -> list[dict] | None:
+    if backend == "ast":
+        from core.mim_ast import extract_source
+        return extract_source(modname, path)
+    return extract_module(modname)
+
+
+def _extract_modules(items: list[tuple[str, str]], backend: str = "import") -> list[tuple[str, list[dict] | None]]:
+    """Process pool işçisi: bir modül grubunu sırayla çıkar."""
+    return [(modname, _extract_one(modname, path, backend)) for modname, path in items]
+
+
+def _group_modules(items: list[tuple[str, str]], chunk: int) -> list[list[tuple[str, str]]]:
+    """Modülleri alt pakete (cobra.modelimpl.<pkg>) göre grupla; büyük paketleri böl."""
+    groups: list[list[tuple[str, str]]] = []
+    last_pkg = None
+    for item in items:
+        modname = item[0]
+        pkg = modname.split(".")[2] if modname.count(".") >= 2 else modname
+        if pkg != last_pkg or len(groups[-1]) >= chunk:
+            groups.append([])
+            last_pkg = pkg
+        groups[-1].append(item)
+    return groups
+
+
+class _CatalogWriter:
+    """Kayıtları toplayıp executemany ile toplu yazar; class id'lerini kendisi atar
+    (seri ve paralel yol aynı sırayla aynı id'leri üretir).
+
+    DB'de zaten olan bir sınıf gelirse id'si korunur, satırı güncellenir ve
+    props/enums/relations/deployment_paths satırları yenileriyle değiştirilir."""
+
+    def __init__(self, conn, batch_size: int = 2000):
+        self.conn = conn
+        self.cur = conn.cursor()
+        self.batch_size = batch_size
+        self.cur.execute("SELECT name, id FROM classes;")
+        self.existing = {r[0]: r[1] for r in self.cur.fetchall()}
+        self.cur.execute("SELECT COALESCE(MAX(id), 0) FROM classes;")
+        self.next_id = self.cur.fetchone()[0] + 1
+        self.seen: set[str] = set()
+        self.touched: set[int] = set()
+        self.counts = {"classes": 0, "props": 0, "prop_enums": 0, "relations": 0, "deployment_paths": 0}
+        self._reset()
+
+    def _reset(self):
+        self.classes, self.updates = [], []
+        self.props, self.enums, self.rels, self.dpaths = [], [], [], []
+
+    def add(self, rec: dict):
+        name = rec["name"]
+        if name in self.seen:
+            return
+        self.seen.add(name)
+        row = (rec["module"], name, rec["label"], rec["category"],
+               rec["rn_format"], rec["naming_props_csv"], rec["descr"])
+        if name in self.existing:
+            cls_id = self.existing[name]
+            self.updates.append(row + (cls_id,))
+        else:
+            cls_id = self.next_id
+            self.next_id += 1
+            self.existing[name] = cls_id
+            self.classes.append((cls_id,) + row)
+        self.touched.add(cls_id)
+        self.props.extend((cls_id,) + p for p in rec["props"])
+        self.enums.extend((cls_id,) + e for e in rec["enums"])
+        self.dpaths.extend((cls_id,) + d for d in rec["dpaths"])
+        # hedefi bilinen ilişkiler yazılırken çözülür; kalanlar resolve_relations'a kalır
+        self.rels.extend((cls_id, t, dst, self.existing.get(_dst_mo_name(dst)), None) for t, dst in rec["relations"])
+        if len(self.classes) + len(self.updates) >= self.batch_size:
+            self.flush()
 
-        for _, obj in inspect.getmembers(mod, inspect.isclass):
-            meta = getattr(obj, "meta", None)
-            if not meta or not getattr(meta, "moClassName", None):
-                continue
-            name = meta.moClassName
-            if name in existing:
-                cls_id = existing[name]
-            else:
-                naming_props = []
-                for p in getattr(meta, "namingProps", []) or []:
-                    pn = _prop_name(p)
-                    if pn:
-                        naming_props.append(pn)
-                cur.execute(
-                    """
-                    INSERT INTO classes(module, name, label, category, rn_format, naming_props_csv, descr)
-                    VALUES (?,?,?,?,?,?,?)
-                    """,
-                    (
-                        modname,
-                        name,
-                        getattr(meta, "label", None),
-                        str(getattr(meta, "category", "")),
-                        getattr(meta, "rnFormat", None),
-                        ",".join(naming_props) if naming_props else None,
-                        getattr(meta, "descr", None),
-                    ),
-                )
-                cls_id = cur.lastrowid
-                existing[name] = cls_id
-
-            # props — version-safe iteration
-            for pname, pmeta in _iter_props(meta):
-                descr = getattr(pmeta, "descr", None)
-                is_naming = 1 if getattr(pmeta, "isNaming", False) else 0
-                is_config = 1 if getattr(pmeta, "isConfig", False) else 0
-                ptype = str(getattr(pmeta, "category", ""))  # PropCategory.* metni
-                regex = getattr(pmeta, "regex", None)
-                cur.execute(
-                    """
-                    INSERT INTO props(class_id, name, descr, is_naming, is_config, ptype, regex)
-                    VALUES (?,?,?,?,?,?,?)
-                    """,
-                    (cls_id, pname, descr, is_naming, is_config, ptype, regex),
-                )
-                # enum sabitlerini sakla
-                for cname, clabel, cval in _iter_constants(pmeta):
-                    cur.execute(
-                        """
-                        INSERT INTO prop_enums(class_id, prop_name, const_name, const_label, const_value)
-                        VALUES (?,?,?,?,?)
-                        """,
-                        (cls_id, pname, cname, clabel, cval),)
-                    
-                # --- DEPLOYMENT PATHS (EKLE) ---
-                for dpath in getattr(meta, "deploymentQueryPaths", []) or []:
-                    try:
-                        name = getattr(dpath, "name", None) or str(dpath)
-                        descr = getattr(dpath, "descr", None) or ""
-                        target = getattr(dpath, "targetClass", None)
-
-                        # Hedef moClassName'ı çıkar
-                        if target and hasattr(target, "meta") and getattr(target.meta, "moClassName", None):
-                            target = target.meta.moClassName
-                        elif isinstance(target, str):
-                            # "cobra.model.nw.If" -> "If"
-                            parts = target.split(".")
-                            target = parts[-1] if parts else target
-
-                        cur.execute(
-                            """
-                            INSERT INTO deployment_paths(class_id, name, descr, target_class)
-                            VALUES (?,?,?,?)
-                            """,
-                            (cls_id, str(name), str(descr), str(target) if target else None),
-                        )
-                    except Exception:
-                        continue
-                # --- DEPLOYMENT PATHS SONU ---
-
-            for rel_type, collection in (
-                ("child", getattr(meta, "childClasses", []) or []),
-                ("parent", getattr(meta, "parentClasses", []) or []),
-                ("rs", getattr(meta, "targetRelations", []) or []),
-                ("rt", getattr(meta, "sourceRelations", []) or []),
-            ):
-                for dst in _iter_rel_names(collection):
-                    if not dst:
-                        continue
-                    cur.execute(
-                        "INSERT INTO relations(src_class_id, rel_type, dst_name, descr) VALUES (?,?,?,?)",
-                        (cls_id, rel_type, str(dst), None),
-                    )
+    def flush(self):
+        cur = self.cur
+        if self.updates:
+            cur.executemany(
+                """
+                UPDATE classes SET module=?, name=?, label=?, category=?, rn_format=?, naming_props_csv=?, descr=?
+                WHERE id=?
+                """,
+                self.updates,
+            )
+            ids = [(u[-1],) for u in self.updates]
+            for table, col in (("props", "class_id"), ("prop_enums", "class_id"),
+                               ("deployment_paths", "class_id"), ("relations", "src_class_id")):
+                cur.executemany(f"DELETE FROM {table} WHERE {col}=?", ids)
+        cur.executemany(
+            """
+            INSERT INTO classes(id, module, name, label, category, rn_format, naming_props_csv, descr)
+            VALUES (?,?,?,?,?,?,?,?)
+            """,
+            self.classes,
+        )
+        cur.executemany(
+            """
+            INSERT INTO props(class_id, name, descr, is_naming, is_config, ptype, regex)
+            VALUES (?,?,?,?,?,?,?)
+            """,
+            self.props,
+        )
+        cur.executemany(
+            """
+            INSERT INTO prop_enums(class_id, prop_name, const_name, const_label, const_value)
+            VALUES (?,?,?,?,?)
+            """,
+            self.enums,
+        )
+        cur.executemany(
+            "INSERT INTO deployment_paths(class_id, name, descr, target_class) VALUES (?,?,?,?)",
+            self.dpaths,
+        )
+        cur.executemany(
+            "INSERT INTO relations(src_class_id, rel_type, dst_name, dst_class_id, descr) VALUES (?,?,?,?,?)",
+            self.rels,
+        )
+        self.conn.commit()
+        self.counts["classes"] += len(self.classes) + len(self.updates)
+        for key, rows in (("props", self.props), ("prop_enums", self.enums),
+                          ("relations", self.rels), ("deployment_paths", self.dpaths)):
+            self.counts[key] += len(rows)
+        self._reset()
 
+
+def _win_memory_counters():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    pmc = PROCESS_MEMORY_COUNTERS()
+    pmc.cb = ctypes.sizeof(pmc)
+    proc = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(proc, ctypes.byref(pmc), pmc.cb):
+        return None
+    return pmc
+
+
+def rss_mb() -> float | None:
+    """Şu anki RSS (MB); ölçülemezse None."""
+    try:
+        if sys.platform == "win32":
+            pmc = _win_memory_counters()
+            return pmc.WorkingSetSize / 2**20 if pmc else None
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except Exception:
+        return None
+
+
+def peak_rss_mb() -> float | None:
+    """Process ömrü boyunca en yüksek RSS (MB); ölçülemezse None."""
+    try:
+        if sys.platform == "win32":
+            pmc = _win_memory_counters()
+            return pmc.PeakWorkingSetSize / 2**20 if pmc else None
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux KB, macOS byte döndürür
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return None
+
+
+def _evict_modules(keep: set[str]) -> int:
+    """keep dışındaki cobra.model/modelimpl modüllerini sys.modules'tan ve
+    parent paket attribute'larından at, sonra gc çalıştır."""
+    evicted = [m for m in list(sys.modules)
+               if m not in keep and (m.startswith("cobra.modelimpl.") or m.startswith("cobra.model."))]
+    for name in evicted:
+        sys.modules.pop(name, None)
+        parent, _, child = name.rpartition(".")
+        pmod = sys.modules.get(parent)
+        if pmod is not None and getattr(pmod, child, None) is not None:
+            try:
+                delattr(pmod, child)
+            except AttributeError:
+                pass
+    importlib.invalidate_caches()
+    gc.collect()
+    return len(evicted)
+
+
+def _in_chunks(cur, sql: str, values: list, size: int = 500):
+    """`IN (...)` sorgusunu parametre sınırına takılmadan parça parça çalıştır."""
+    rows = []
+    for i in range(0, len(values), size):
+        part = values[i:i + size]
+        cur.execute(sql.format(marks=",".join("?" * len(part))), part)
+        rows.extend(cur.fetchall())
+    return rows
+
+
+BACKENDS = ("import", "ast")
+
+
+def _dst_mo_name(dst: str) -> str:
+    # 'cobra.model.fv.AEPg' -> 'fvAEPg' (resolve_relations'taki CASE ile aynı kural)
+    if dst.startswith("cobra.model."):
+        return dst[12:].replace(".", "")
+    return dst
+
+
+def resolve_relations(conn) -> int:
+    """relations.dst_name → dst_class_id, tek seferde (temp tablo + tek UPDATE).
+
+    dst_name hem moClassName ('fvAEPg') hem de cobra sınıf yolu ('cobra.model.fv.AEPg')
+    olabilir; ikincisi paket + sınıf adı birleştirilerek moClassName'e çevrilir."""
+    cur = conn.cursor()
+    cur.execute("DROP TABLE IF EXISTS temp._rel_map;")
+    cur.execute("""
+    CREATE TEMP TABLE _rel_map AS
+    SELECT d.dst_name AS dst_name, c.id AS class_id
+    FROM (SELECT DISTINCT dst_name FROM relations
+          WHERE dst_class_id IS NULL AND dst_name IS NOT NULL) d
+    JOIN classes c ON c.name = CASE
+        WHEN d.dst_name LIKE 'cobra.model.%' THEN replace(substr(d.dst_name, 13), '.', '')
+        ELSE d.dst_name END;
+    """)
+    cur.execute("CREATE UNIQUE INDEX temp.ux_rel_map ON _rel_map(dst_name);")
+    if sqlite3.sqlite_version_info >= (3, 33, 0):
+        cur.execute("""
+        UPDATE relations SET dst_class_id = m.class_id
+        FROM _rel_map m
+        WHERE relations.dst_class_id IS NULL AND relations.dst_name = m.dst_name;
+        """)
+    else:
+        cur.execute("""
+        UPDATE relations
+        SET dst_class_id = (SELECT m.class_id FROM _rel_map m WHERE m.dst_name = relations.dst_name)
+        WHERE dst_class_id IS NULL AND dst_name IN (SELECT dst_name FROM _rel_map);
+        """)
+    n = cur.rowcount
+    cur.execute("DROP TABLE temp._rel_map;")
     conn.commit()
+    return n
+
+
+def load_all(workers: int = 1, batch_size: int = 2000, chunk: int = 200, force: bool = False,
+             backend: str = "import", stream: bool = False, max_rss_mb: float | None = None) -> dict:
+    """MIM'i DB'ye yükle.
+
+    Her modelimpl modülünün parmak izi (acimodel sürümü + kaynak sha1) mim_modules
+    tablosunda tutulur; hash'i değişmeyen modüller (sürüm değişse de) atlanır, değişenlerin satırları
+    yerinde değiştirilir. force=True tüm modülleri yeniden yükler.
+
+    workers > 1 ise modelimpl alt paketleri bir process pool'da çıkarılır,
+    yazma tek bir writer üzerinden (bu process) toplu yapılır. Sonuç seri yol ile aynıdır.
+
+    backend="ast" modülleri import etmek yerine kaynak dosyalarını ast ile okur
+    (bkz. core.mim_ast); aynı kataloğu üretir.
+
+    stream=True bellek sınırlı moddur: modelimpl alt paketleri tek tek işlenir, her
+    paketin satırları yazılır ve modülleri sys.modules'tan atılır. max_rss_mb verilirse
+    RSS bu değeri aştığında paket bitmeden de yazılıp boşaltılır. workers yok sayılır.
+    Tepe RSS log'a ve dönen istatistiklere yazılır.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"bilinmeyen backend: {backend}")
+    init_db()
+    t0 = time.perf_counter()
+    conn = get_conn(); cur = conn.cursor()
+    try:
+        version = model_version()
+        sources = list(iter_modelimpl_sources())
+        hashes = {name: _file_hash(path) for name, path in sources}
+        cur.execute("SELECT module, hash FROM mim_modules;")
+        stored = {r[0]: r[1] for r in cur.fetchall()}
+        # atlama kararı yalnızca kaynak hash'ine bakar: acimodel yama sürümünde içeriği değişmeyen
+        # modüller yeniden yüklenmez (version, modülün en son hangi sürümle çıkarıldığını gösterir)
+        todo = [(name, path) for name, path in sources
+                if force or hashes[name] is None or stored.get(name) != hashes[name]]
+        modnames = [name for name, _ in todo]
+        removed = [m for m in stored if m not in hashes]
+
+        # değişen/silinen modüllerin eski sınıfları: yüklemeden sonra görülmeyenler silinecek
+        candidates = {
+            r[0]: r[1]
+            for r in _in_chunks(cur, "SELECT name, id FROM classes WHERE module IN ({marks});", modnames + removed)
+        }
+
+        writer = _CatalogWriter(conn, batch_size=batch_size)
+        done: list[str] = []
 
-    # 2) ikinci geçiş: dst_name → dst_class_id
-    cur.execute("SELECT id, dst_name FROM relations WHERE dst_class_id IS NULL AND dst_name IS NOT NULL;")
-    for rel_id, dst_name in cur.fetchall():
-        cur.execute("SELECT id FROM classes WHERE name=?", (dst_name,))
-        row = cur.fetchone()
-        if row:
-            cur.execute("UPDATE relations SET dst_class_id=? WHERE id=?", (row[0], rel_id))
-
-    conn.commit(); conn.close()
-    rebuild_fts()
-    logging.info("MIM load ok — classes/props/relations doldu ve FTS güncellendi.")
\ No newline at end of file
+        def _consume(modname, records):
+            if records is None:
+                return  # import hatası: parmak izi yazılmaz, bir sonraki yüklemede tekrar denenir
+            for rec in records:
+                writer.add(rec)
+            done.append(modname)
+
+        # 1) classes & props & relations(dst_name)
+        evictions = 0
+        if stream:
+            keep = set(sys.modules)
+            warned = False
+            for group in _group_modules(todo, chunk=len(todo) or 1):
+                for modname, path in group:
+                    _consume(modname, _extract_one(modname, path, backend))
+                    cur_rss = rss_mb() if max_rss_mb and not warned else None
+                    if cur_rss is not None and cur_rss > max_rss_mb:
+                        # tavan aşıldı: paketi beklemeden yaz ve boşalt
+                        writer.flush()
+                        evictions += _evict_modules(keep)
+                        cur_rss = rss_mb()
+                        if cur_rss is not None and cur_rss > max_rss_mb and not warned:
+                            # tavan ulaşılamaz; paket başına boşaltmaya dön
+                            logging.warning("RSS %.0f MB, tavan %.0f MB boşaltmadan sonra da aşılıyor", cur_rss, max_rss_mb)
+                            warned = True
+                writer.flush()
+                evictions += _evict_modules(keep)
+        elif workers > 1 and len(todo) > chunk:
+            groups = _group_modules(todo, chunk)
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                # map sırayı korur -> id'ler seri yolla aynı
+                for results in ex.map(partial(_extract_modules, backend=backend), groups):
+                    for modname, records in results:
+                        _consume(modname, records)
+        else:
+            for modname, path in todo:
+                _consume(modname, _extract_one(modname, path, backend))
+        writer.flush()
+
+        stale = [cid for name, cid in candidates.items() if name not in writer.seen]
+        for i in range(0, len(stale), 500):
+            part = stale[i:i + 500]
+            marks = ",".join("?" * len(part))
+            cur.execute(f"DELETE FROM classes WHERE id IN ({marks});", part)  # cascade: props/enums/relations
+            cur.execute(f"UPDATE relations SET dst_class_id=NULL WHERE dst_class_id IN ({marks});", part)
+        cur.executemany("DELETE FROM mim_modules WHERE module=?", [(m,) for m in removed])
+        cur.executemany(
+            "INSERT OR REPLACE INTO mim_modules(module, version, hash, loaded_at) VALUES (?,?,?,datetime('now'))",
+            [(m, version, hashes[m]) for m in done],
+        )
+        conn.commit()
+        t_extract = time.perf_counter() - t0
+
+        affected = writer.touched | set(stale)
+        t_resolve = t_fts = t_mat = 0.0
+        resolved = 0
+        if affected:
+            # 2) ikinci geçiş: dst_name → dst_class_id (set-based)
+            t1 = time.perf_counter()
+            resolved = resolve_relations(conn)
+            t_resolve = time.perf_counter() - t1
+    finally:
+        conn.close()
+    if affected:
+        t1 = time.perf_counter()
+        # tetikleyiciler dokunulan sınıfları fts_dirty'ye yazdı
+        sync_fts()
+        t_fts = time.perf_counter() - t1
+        # 3) şablon / pipeline seçenekleri (silinenler cascade ile gitti)
+        t1 = time.perf_counter()
+        materialize(writer.touched)
+        # zincirler ata sınıflara bağlı: her zaman tamamı (tek BFS)
+        materialize_dn_paths()
+        refresh_memory_catalog()
+        invalidate_class_meta()
+        invalidate_graph()
+        t_mat = time.perf_counter() - t1
+
+    elapsed = time.perf_counter() - t0
+    counts = writer.counts
+    rows = sum(counts.values())
+    peak = peak_rss_mb()
+    stats = dict(counts, modules=len(modnames), skipped=len(sources) - len(modnames), removed=len(stale),
+                 workers=workers, backend=backend, extract_s=round(t_extract, 2), resolve_s=round(t_resolve, 3),
+                 fts_s=round(t_fts, 2), materialize_s=round(t_mat, 2), total_s=round(elapsed, 2),
+                 stream=stream, evicted_modules=evictions, peak_rss_mb=round(peak, 1) if peak else None)
+    if not affected:
+        logging.info("MIM değişmemiş (acimodel %s, %d modül) — yükleme atlandı.", version, len(sources))
+        return stats
+    logging.info(
+        "MIM load ok — %d modül (%d atlandı), %d class, %d prop, %d enum, %d relation, %d silindi; "
+        "%.1fs (%.0f class/s, %.0f row/s, workers=%d, backend=%s, stream=%s, peak RSS %s MB)",
+        len(modnames), stats["skipped"], counts["classes"], counts["props"], counts["prop_enums"],
+        counts["relations"], len(stale), elapsed,
+        counts["classes"] / t_extract if t_extract else 0, rows / t_extract if t_extract else 0, workers, backend,
+        stream, stats["peak_rss_mb"] if stats["peak_rss_mb"] is not None else "?",
+    )
+    logging.info("  extract+write %.2fs | relation resolve %.3fs (%d çözüldü) | fts %.2fs | şablonlar %.2fs",
+                 t_extract, t_resolve, resolved, t_fts, t_mat)
+    return stats
@@ -1 +1,192 @@
 # Optional SSH via Netmiko
+# core/netops.py
+"""Render edilmiş moquery komutlarını (grep/sort pipeline'ı dahil) çok sayıda APIC /
+switch üzerinde aynı anda çalıştırır.
+
+    pool = SshPool(max_workers=16)
+    for res in pool.run(hosts, render_moquery("fvTenant", conds)):
+        print(res.host, res.ok, res.seconds)
+
+- Sınırlı iş parçacığı havuzu (max_workers); sonuçlar geldikçe üretilir.
+- Host başına kalıcı netmiko bağlantısı; sonraki sorgular yeniden kullanır. Netmiko
+  bağlantısı thread-safe değil: host başına bir kilit, aynı anda tek komut.
+- Kopmuş (bayat) bağlantıda bir kez yeniden bağlanılır.
+- Host başına gecikme istatistikleri (stats).
+
+netmiko opsiyoneldir; yalnızca bağlantı kurulurken import edilir.
+"""
+import logging, threading, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Optional
+
+DEFAULT_WORKERS = 8
+CONNECT_TIMEOUT = 15.0   # sn, TCP/SSH kurulumu
+COMMAND_TIMEOUT = 120.0  # sn, komut çıktısının tamamlanması (büyük moquery'ler uzun sürer)
+
+
+@dataclass(frozen=True)
+class Host:
+    host: str
+    username: str
+    password: str
+    device_type: str = "cisco_apic"  # switch'ler için: "linux" (iBash) ya da "cisco_nxos"
+    port: int = 22
+    timeout: float = COMMAND_TIMEOUT
+
+
+@dataclass
+class HostResult:
+    host: str                 # çağıranın verdiği Host.host
+    ok: bool
+    output: str = ""
+    error: Optional[str] = None
+    seconds: float = 0.0
+    reconnected: bool = False
+    key: str = ""             # havuz / stats anahtarı: "user@host:port"
+
+
+class HostStats:
+    __slots__ = ("runs", "errors", "total", "min", "max", "last", "connects")
+
+    def __init__(self):
+        self.runs = self.errors = self.connects = 0
+        self.total = self.last = self.max = 0.0
+        self.min = None
+
+    def add(self, secs: float, ok: bool):
+        self.runs += 1
+        self.errors += not ok
+        self.total += secs
+        self.last = secs
+        self.max = max(self.max, secs)
+        self.min = secs if self.min is None else min(self.min, secs)
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.runs if self.runs else 0.0
+
+    def as_dict(self) -> Dict:
+        return {"runs": self.runs, "errors": self.errors, "connects": self.connects, "avg": self.avg,
+                "min": self.min or 0.0, "max": self.max, "last": self.last}
+
+
+def _key(h: Host) -> str:
+    # aynı cihaza farklı kullanıcılarla ayrı bağlantılar
+    return f"{h.username}@{h.host}:{h.port}"
+
+
+class _HostConn:
+    __slots__ = ("lock", "conn", "params")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.conn = None
+        self.params = None  # bağlantının açıldığı (password, device_type)
+
+
+class SshPool:
+    """Host başına kalıcı bağlantılar + sınırlı paralel yürütme."""
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS, connect_timeout: float = CONNECT_TIMEOUT):
+        self.max_workers = max_workers
+        self.connect_timeout = connect_timeout
+        self._conns: Dict[str, _HostConn] = {}
+        self._stats: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+        # stats yazma / okuma kilidi (host kilitleri komut boyunca tutulur, stats() onları beklemez)
+        self._stats_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="netops")
+
+    def _slot(self, key: str) -> _HostConn:
+        with self._lock:
+            slot = self._conns.get(key)
+            if slot is None:
+                slot = self._conns[key] = _HostConn()
+                with self._stats_lock:
+                    self._stats[key] = HostStats()
+            return slot
+
+    def _connect(self, h: Host):
+        from netmiko import ConnectHandler
+        conn = ConnectHandler(
+            device_type=h.device_type, host=h.host, port=h.port, username=h.username, password=h.password,
+            conn_timeout=self.connect_timeout, auth_timeout=self.connect_timeout,
+            banner_timeout=self.connect_timeout, fast_cli=True,
+        )
+        with self._stats_lock:
+            self._stats[_key(h)].connects += 1
+        return conn
+
+    def _run_one(self, h: Host, command: str) -> HostResult:
+        key = _key(h)
+        slot = self._slot(key)
+        t0 = time.perf_counter()
+        reconnected = False
+        with slot.lock:
+            if slot.conn is not None and slot.params != (h.password, h.device_type):
+                # parola / cihaz tipi değişmiş: eski bağlantı yeniden kullanılmaz
+                self._drop(slot)
+            for attempt in (0, 1):
+                fresh = slot.conn is None
+                try:
+                    if fresh:
+                        slot.conn = self._connect(h)
+                        slot.params = (h.password, h.device_type)
+                    out = slot.conn.send_command(command, read_timeout=h.timeout, strip_prompt=True,
+                                                 strip_command=True)
+                    res = HostResult(h.host, True, out, seconds=time.perf_counter() - t0,
+                                     reconnected=reconnected, key=key)
+                    break
+                except Exception as e:
+                    self._drop(slot)
+                    # yeniden kullanılan bağlantı kopmuş olabilir: bir kez taze bağlantıyla dene
+                    if fresh or attempt:
+                        res = HostResult(h.host, False, error=f"{type(e).__name__}: {e}",
+                                         seconds=time.perf_counter() - t0, reconnected=reconnected, key=key)
+                        break
+                    reconnected = True
+            with self._stats_lock:
+                self._stats[key].add(res.seconds, res.ok)
+        if not res.ok:
+            logging.warning("netops %s: %s", key, res.error.splitlines()[0])  # netmiko mesajları çok satırlı
+        return res
+
+    @staticmethod
+    def _drop(slot: _HostConn):
+        if slot.conn is not None:
+            try:
+                slot.conn.disconnect()
+            except Exception:
+                pass
+            slot.conn = None
+
+    def run(self, hosts: Iterable[Host], command: str) -> Iterator[HostResult]:
+        """Komutu tüm hostlarda çalıştır; sonuçları bitiş sırasıyla üret."""
+        futures = [self._executor.submit(self._run_one, h, command) for h in hosts]
+        try:
+            for fut in as_completed(futures):
+                yield fut.result()
+        finally:
+            # tüketici erken bıraktıysa henüz başlamamış işler iptal edilir
+            for fut in futures:
+                fut.cancel()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Host anahtarı ("user@host:port") başına tutarlı bir anlık görüntü."""
+        with self._stats_lock:
+            return {k: s.as_dict() for k, s in self._stats.items()}
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            for slot in self._conns.values():
+                with slot.lock:
+                    self._drop(slot)
+            self._conns.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
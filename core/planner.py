@@ -0,0 +1,159 @@
+# core/planner.py
+"""Büyük filtrelerin alt sorgulara bölünmesi.
+
+Binlerce değerli bir 'in' (ör. yapıştırılmış EPG / VLAN listesi) ya da uzun bir regex
+alternasyonu (a|b|c|...) tek filtrede APIC'in kabul ettiği boyutu aşar ve yavaş
+değerlendirilir. plan() bu koşulları boyut sınırlı parçalara böler; koşullar AND
+olduğundan alt sorgular parçaların kartezyen çarpımıdır. run_planned() alt sorguları
+yürütme katmanı üzerinden paralel çalıştırır, sonuçları dn'e göre tekilleştirerek
+tek bir sorguymuş gibi akıtır.
+
+startswith bölünmez: render edilen '^a|b' içinde ^ yalnızca ilk alternatife bağlıdır,
+bölmek anlamı değiştirirdi.
+"""
+import itertools, queue, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from core.moquery import Condition, render_moquery
+
+MAX_IN_ITEMS = 100       # alt sorgu başına 'in' değeri / alternatif sayısı
+MAX_VALUE_CHARS = 2000   # alt sorgu başına koşul değeri uzunluğu (URL / CLI sınırının altında)
+MAX_SUBQUERIES = 256     # kartezyen çarpım bunu aşarsa hata (yanlışlıkla binlerce istek atmayalım)
+DEFAULT_WORKERS = 4
+_QUEUE_SIZE = 5000       # alt sorgulardan gelen, henüz tüketilmemiş kayıtlar (geri basınç)
+
+Executor = Callable[[str, Sequence[Condition]], Iterable[Dict[str, str]]]
+
+
+def split_alternation(pattern: str) -> List[str]:
+    """Regex'i üst seviye '|' noktalarından ayır; parantez / köşeli parantez / kaçış içindekiler
+    bölünmez. Üst seviyede alternasyon yoksa tek elemanlı liste."""
+    parts, depth, in_class, start, i = [], 0, False, 0, 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            parts.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+
+def _items(c: Condition) -> Optional[List[str]]:
+    """Bölünebilir koşulun öğeleri; bölünemezse None."""
+    if c.op == "in":
+        return list(dict.fromkeys(x.strip() for x in c.value.split(",") if x.strip()))
+    if c.op in ("regex", "contains"):
+        parts = split_alternation(c.value)
+        return parts if len(parts) > 1 else None
+    return None
+
+
+def _chunks(items: List[str], sep: str, max_items: int, max_chars: int) -> List[str]:
+    out, cur, size = [], [], 0
+    for it in items:
+        if cur and (len(cur) >= max_items or size + len(sep) + len(it) > max_chars):
+            out.append(sep.join(cur))
+            cur, size = [], 0
+        size += len(it) + (len(sep) if cur else 0)
+        cur.append(it)
+    if cur:
+        out.append(sep.join(cur))
+    return out
+
+
+def split_condition(c: Condition, max_items: int = MAX_IN_ITEMS,
+                    max_chars: int = MAX_VALUE_CHARS) -> List[Condition]:
+    """Sınırı aşan koşulu eşdeğer parçalara (OR) böl; aşmıyorsa [c]."""
+    items = _items(c)
+    if items is None or (len(items) <= max_items and len(c.value) <= max_chars):
+        return [c]
+    sep = "," if c.op == "in" else "|"
+    return [Condition(prop=c.prop, op=c.op, value=v) for v in _chunks(items, sep, max_items, max_chars)]
+
+
+def plan(conds: Sequence[Condition], max_items: int = MAX_IN_ITEMS, max_chars: int = MAX_VALUE_CHARS,
+         max_subqueries: int = MAX_SUBQUERIES) -> List[List[Condition]]:
+    """Koşul listesini alt sorgulara böl. Sonuçların birleşimi orijinal sorgunun sonucudur."""
+    options = [split_condition(c, max_items, max_chars) for c in conds]
+    total = 1
+    for opts in options:
+        total *= len(opts)
+    if total > max_subqueries:
+        raise ValueError(f"filtre {total} alt sorguya bölünüyor (sınır {max_subqueries}); listeyi daraltın")
+    return [list(combo) for combo in itertools.product(*options)]
+
+
+def render_planned(class_name: str, conds: Sequence[Condition], **kwargs) -> List[str]:
+    """CLI için: her alt sorgunun moquery komutu (render_moquery argümanlarıyla)."""
+    return [render_moquery(class_name, sub, **kwargs) for sub in plan(conds)]
+
+
+_DONE = object()
+
+
+def run_planned(execute: Executor, class_name: str, conds: Sequence[Condition],
+                workers: int = DEFAULT_WORKERS, **plan_kwargs) -> Iterator[Dict[str, str]]:
+    """Alt sorguları `execute` (ör. ApicClient.class_query) ile paralel çalıştır; kayıtları
+    geldikçe, dn'e göre tekilleştirerek üret. Tek alt sorguda doğrudan execute'a gider."""
+    subs = plan(conds, **plan_kwargs)
+    if len(subs) == 1:
+        yield from execute(class_name, subs[0])
+        return
+
+    out: "queue.Queue" = queue.Queue(maxsize=_QUEUE_SIZE)
+    stop = threading.Event()
+
+    def put(item):
+        # tüketici bıraktıysa (stop) dolu kuyrukta sonsuza dek beklenmez
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def worker(sub):
+        try:
+            for rec in execute(class_name, sub):
+                if stop.is_set():
+                    return
+                put(rec)
+        except BaseException as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    pool = ThreadPoolExecutor(max_workers=min(workers, len(subs)), thread_name_prefix="planner")
+    for sub in subs:
+        pool.submit(worker, sub)
+    seen = set()
+    pending = len(subs)
+    try:
+        while pending:
+            item = out.get()
+            if item is _DONE:
+                pending -= 1
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                dn = item.get("dn")
+                if dn is None or dn not in seen:
+                    if dn is not None:
+                        seen.add(dn)
+                    yield item
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,134 @@
+# core/predicates.py
+"""Builder koşullarının (Condition) yerel değerlendirmesi: APIC'e gitmeden yakalanmış
+MO'lar (core.captures) üzerinde aynı filtreyi çalıştırır.
+
+contains/regex/startswith APIC'te wcard (regex araması) olarak gider, burada da öyle.
+'in' virgüllü listenin tam eşleşmesidir (küme üyeliği); REST filtresi (core.apic,
+or(eq(...), ...)) ile aynıdır. FARK: CLI komutu (build_filter_string) 'in'i wcard
+"(a|b)" olarak yazar, bu alt dizgeleri de eşler: 'prod,web' için CLI 'prod-web'i
+de döndürür, yerel değerlendirme döndürmez (CLI sonucu yerelin üst kümesidir).
+Regex'ler bir kez derlenir; metakarakter içermeyen değerler düz string işlemleriyle
+(in / startswith) eşlenir.
+
+Tarama sütun sütun ve parti parti yapılır: her koşul yalnızca önceki koşulları geçen
+satırlar üzerinde, tek bir sütun listesinde çalışır.
+"""
+import json, re
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.captures import last_capture_table
+from core.db import get_conn
+from core.moquery import Condition
+
+SCAN_BATCH = 10000
+_REGEX_META = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+def _in_items(value: str) -> frozenset:
+    return frozenset(x.strip() for x in value.split(",") if x.strip())
+
+
+def compile_condition(c: Condition) -> Callable[[str], bool]:
+    """Tek değer → bool. Eksik prop '' olarak değerlendirilir (moquery boş yazar)."""
+    val = c.value
+    if c.op == "exact":
+        return val.__eq__
+    if c.op == "in":
+        return _in_items(val).__contains__
+    if c.op in ("contains", "startswith") and not _REGEX_META.search(val):
+        if c.op == "contains":
+            return lambda s: val in s
+        return lambda s: s.startswith(val)
+    pattern = f"^{val}" if c.op == "startswith" else val
+    try:
+        rx = re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"{c.prop}: geçersiz regex {val!r}: {e}") from None
+    return lambda s: rx.search(s) is not None
+
+
+class CompiledFilter:
+    """Koşul listesi (AND). props: değerlendirmede gereken prop'lar (sıralı, tekil)."""
+    __slots__ = ("conds", "tests", "props")
+
+    def __init__(self, conds: Sequence[Condition]):
+        self.conds = list(conds)
+        self.tests = [(c.prop, compile_condition(c)) for c in self.conds]
+        self.props = tuple(dict.fromkeys(c.prop for c in self.conds))
+
+    def match(self, rec: Dict[str, str]) -> bool:
+        return all(test(rec.get(prop) or "") for prop, test in self.tests)
+
+    def select(self, columns: Dict[str, List[Optional[str]]], n: int) -> List[int]:
+        """Bir partide koşulları geçen satırların indeksleri."""
+        idx = range(n)
+        for prop, test in self.tests:
+            col = columns[prop]
+            idx = [i for i in idx if test(col[i] or "")]
+            if not idx:
+                break
+        return list(idx)
+
+
+def compile_conditions(conds: Sequence[Condition]) -> CompiledFilter:
+    return CompiledFilter(conds)
+
+
+def _table_columns(conn, table: str) -> set:
+    return {r[1] for r in conn.execute(f'PRAGMA table_info("{table}");')}
+
+
+def scan_capture(class_name: str, conds: Sequence[Condition], limit: Optional[int] = None,
+                 batch: int = SCAN_BATCH, cancelled: Optional[Callable[[], bool]] = None,
+                 capture: Optional[Tuple[str, int]] = None) -> Iterator[Tuple[str, Dict[str, Optional[str]]]]:
+    """Sınıfın son yakalamasında koşullara uyan MO'lar: (dn, {prop: değer}).
+    capture: (tablo, capture_id); verilmezse mo_tables'tan okunur.
+    Yalnızca koşulların kullandığı kolonlar okunur; kolonu olmayan prop'lar _extra'dan."""
+    flt = compile_conditions(conds)
+    found = capture or last_capture_table(class_name)
+    if found is None:
+        return
+    table, capture_id = found
+    conn = get_conn()
+    try:
+        have = _table_columns(conn, table)
+        direct = [p for p in flt.props if p in have]
+        extra = [p for p in flt.props if p not in have]
+        cols = ["dn", *direct] + (["_extra"] if extra else [])
+        sel = ", ".join(f'"{c}"' for c in cols)
+        # yalnızca mo_tables'taki yakalamanın satırları (tablo ile mo_tables aynı transaction'da yazılır)
+        cur = conn.execute(f'SELECT {sel} FROM "{table}" WHERE capture_id = ?;', (capture_id,))
+        emitted = 0
+        while True:
+            rows = cur.fetchmany(batch)
+            if not rows:
+                break
+            if cancelled and cancelled():
+                return
+            columns = dict(zip(cols, zip(*rows)))
+            if extra:
+                blobs = [json.loads(b) if b else {} for b in columns.pop("_extra")]
+                for p in extra:
+                    columns[p] = [b.get(p) for b in blobs]
+            for i in flt.select(columns, len(rows)):
+                yield columns["dn"][i], {p: columns[p][i] for p in flt.props}
+                emitted += 1
+                if limit is not None and emitted >= limit:
+                    return
+    finally:
+        conn.close()
+
+
+def preview_matches(class_name: str, conds: Sequence[Condition], limit: int = 50,
+                    cancelled: Optional[Callable[[], bool]] = None) -> Optional[Dict]:
+    """Builder önizlemesi: ilk `limit` eşleşme ve toplam eşleşme sayısı.
+    Sınıfın yakalaması yoksa None."""
+    found = last_capture_table(class_name)
+    if found is None:
+        return None
+    dns, total = [], 0
+    for dn, _ in scan_capture(class_name, conds, cancelled=cancelled, capture=found):
+        if len(dns) < limit:
+            dns.append(dn)
+        total += 1
+    return {"capture_id": found[1], "dns": dns, "total": total}
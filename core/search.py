@@ -1,23 +1,350 @@
-from typing import List, Dict
-from core.db import get_conn
+import re, sqlite3, threading, time, unicodedata
+from collections import OrderedDict
+from typing import Callable, List, Dict, Optional
+from core.db import catalog_stamp, get_catalog_conn, has_trigram_index, FTS_COLUMNS, FTS_WEIGHTS
 
-def fts_query(q: str, limit: int = 20) -> List[Dict]:
-    q = q.strip()
-    if not q:
-        return []
-    tokens = [t for t in q.split() if t]
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+SEARCH_STAMP_TTL = 5.0  # sn; katalog damgası en fazla bu sıklıkla okunur
+
+
+def _tokens(q: str) -> List[str]:
+    # unicode61 tokenizer'ı gibi: harf/rakam dışı her şey ayırıcı, aksanlar atılır
+    q = unicodedata.normalize("NFKD", q or "")
+    q = "".join(ch for ch in q if not unicodedata.combining(ch))
+    return [t.lower() for t in _WORD.findall(q)]
+
+
+_TEXT = " || ' ' || ".join(f"f.{c}" for c in FTS_COLUMNS)
+_BM25 = ", ".join(str(w) for w in FTS_WEIGHTS)
+
+
+def _name_rank(name: str, key: str) -> int:
+    # 0: isim birebir, 1: isim sorguyla başlıyor, 2: diğer
+    name = (name or "").lower()
+    return 0 if name == key else 1 if name.startswith(key) else 2
+
+
+def _fts_rows(tokens: List[str], limit: int, cancelled: Optional[Callable[[], bool]] = None) -> Optional[List[Dict]]:
+    """Sıralı FTS sorgusu: önce birebir / önek isim eşleşmesi, sonra bm25 (isim kolonu
+    en ağır). Satırlara eşleşme metni (_text) de eklenir. İptal edilirse None."""
     match = " ".join(f"{t}*" for t in tokens)
-    conn = get_conn(); cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT c.id, c.name, c.label, c.category, c.descr
-        FROM class_fts f
-        JOIN classes c ON c.id = f.rowid
-        WHERE f.content MATCH ?
-        LIMIT ?;
+    key = "".join(tokens)
+    conn = get_catalog_conn(); cur = conn.cursor()
+    if cancelled is not None:
+        # uzun süren sorguyu yarıda kes (eskimiş arama)
+        conn.set_progress_handler(lambda: 1 if cancelled() else 0, 1000)
+    try:
+        cur.execute(
+            f"""
+            SELECT c.id, c.name, c.label, c.category, c.descr, {_TEXT} AS _text
+            FROM class_fts f
+            JOIN classes c ON c.id = f.rowid
+            WHERE class_fts MATCH ?
+            ORDER BY CASE WHEN lower(c.name) = ? THEN 0
+                          WHEN lower(c.name) >= ? AND lower(c.name) < ? THEN 1
+                          ELSE 2 END,
+                     bm25(class_fts, {_BM25})
+            LIMIT ?;
+            """,
+            (match, key, key, key + "\uffff", limit),
+        )
+        rows = [dict(r) for r in cur.fetchall()]
+    except sqlite3.OperationalError:
+        if cancelled is not None and cancelled():
+            return None
+        raise
+    finally:
+        if cancelled is not None:
+            conn.set_progress_handler(None, 0)
+        conn.close()
+    return rows
+
+
+def fts_query(q: str, limit: int = 20, cancelled: Optional[Callable[[], bool]] = None) -> List[Dict]:
+    tokens = _tokens(q)
+    if not tokens:
+        return []
+    rows = _fts_rows(tokens, limit, cancelled) or []
+    for r in rows:
+        r.pop("_text", None)
+    return rows
+
+
+def _text_matches(tokens: List[str], text: str) -> bool:
+    words = _tokens(text)
+    return all(any(w.startswith(t) for w in words) for t in tokens)
+
+
+# ters arama türleri: (tablo, eşleşen kolon, "via" ifadesi)
+_REVERSE = {
+    "prop": ("props", "name", "x.name"),
+    "enum": ("prop_enums", "const_name", "x.prop_name || '=' || x.const_name"),
+}
+REVERSE_KINDS = tuple(_REVERSE)
+
+
+def reverse_query(q: str, kind: str = "prop", limit: int = 200) -> List[Dict]:
+    """Prop adından (`encap`, `operSt`) ya da enum sabitinden (`up`, `learned`) sahip
+    sınıflara. Büyük/küçük harf duyarsız önek araması; birebir eşleşenler önce gelir.
+    Her satırda eşleşen prop'lar `via` alanındadır."""
+    table, col, via = _REVERSE[kind]
+    term = (q or "").strip()
+    if not term:
+        return []
+    hi = term + "\uffff"
+    conn = get_catalog_conn()
+    try:
+        # id'ler (col NOCASE, class_id) index'inden sırayla akar; limit dolunca durulur
+        ids: Dict[int, bool] = {}
+        for exact, sql, args in (
+            (True, f"SELECT class_id FROM {table} WHERE {col} = ? COLLATE NOCASE ORDER BY class_id;", (term,)),
+            (False, f"SELECT class_id FROM {table} WHERE {col} > ? COLLATE NOCASE AND {col} < ? COLLATE NOCASE;",
+             (term, hi)),
+        ):
+            for (cid,) in conn.execute(sql, args):
+                ids.setdefault(cid, exact)
+                if len(ids) >= limit:
+                    break
+            if len(ids) >= limit:
+                break
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        rows = {r["id"]: dict(r) for r in conn.execute(
+            f"SELECT id, name, label, category, descr FROM classes WHERE id IN ({marks});", list(ids))}
+        for cid, v in conn.execute(
+            f"""SELECT x.class_id, GROUP_CONCAT({via}, ', ') FROM {table} x
+                WHERE x.class_id IN ({marks}) AND x.{col} >= ? COLLATE NOCASE AND x.{col} < ? COLLATE NOCASE
+                GROUP BY x.class_id;""",
+            [*ids, term, hi],
+        ):
+            rows[cid]["via"] = v
+    finally:
+        conn.close()
+    return sorted(rows.values(), key=lambda r: (not ids[r["id"]], r["name"]))
+
+
+# yedek (trigram + edit mesafesi) aşamalarının toplam süre bütçesi
+FUZZY_BUDGET = 0.05
+# edit mesafesi için trigram ile seçilen en fazla aday
+FUZZY_CANDIDATES = 300
+
+
+def _max_distance(key: str) -> int:
+    return 1 if len(key) <= 5 else 2 if len(key) <= 9 else 3
+
+
+def _distance(key: str, name: str, cap: int) -> int:
+    """key'in name içindeki en yakın alt dizgeye Levenshtein mesafesi ("tennat" ~ "fvtenant": 2).
+    cap aşılınca erken çıkar (cap + 1 döner)."""
+    prev = [0] * (len(name) + 1)
+    for i, ck in enumerate(key, 1):
+        cur = [i]
+        for j, cn in enumerate(name, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ck != cn)))
+        if min(cur) > cap:
+            return cap + 1
+        prev = cur
+    return min(prev)
+
+
+def _trgm_rows(conn, tokens: List[str], limit: int) -> List[Dict]:
+    """Sınıf adının içinde geçen parçalar ("path l3out" → l3extRsPathL3OutAtt).
+    Trigram indeksi en az 3 harfli parçaları kullanır; kısalar satırlar üzerinde süzülür."""
+    long = [t for t in tokens if len(t) >= 3]
+    if long:
+        match = " AND ".join(f'"{t}"' for t in long)
+        cur = conn.execute(
+            """
+            SELECT c.id, c.name, c.label, c.category, c.descr
+            FROM class_trgm t JOIN classes c ON c.id = t.rowid
+            WHERE class_trgm MATCH ?
+            ORDER BY length(c.name), c.name;
+            """,
+            (match,),
+        )
+    else:
+        cur = conn.execute(
+            "SELECT id, name, label, category, descr FROM classes WHERE name LIKE ? ORDER BY length(name), name;",
+            (f"%{tokens[0]}%",),
+        )
+    out = []
+    for r in cur:
+        name = r["name"].lower()
+        if all(t in name for t in tokens):
+            out.append(dict(r))
+            if len(out) >= limit:
+                break
+    return out
+
+
+def _edit_candidates(conn, grams: List[str], trigram: bool) -> list:
+    if trigram:
+        return conn.execute(
+            """
+            SELECT c.id, c.name, c.label, c.category, c.descr
+            FROM class_trgm t JOIN classes c ON c.id = t.rowid
+            WHERE class_trgm MATCH ?
+            ORDER BY rank LIMIT ?;
+            """,
+            (" OR ".join(f'"{g}"' for g in grams), FUZZY_CANDIDATES),
+        ).fetchall()
+    # trigram indeksi yok (SQLite < 3.34): ortak 3'lü sayısına göre tarama
+    score = " + ".join("(instr(lower(name), ?) > 0)" for _ in grams)
+    return conn.execute(
+        f"""
+        SELECT id, name, label, category, descr FROM (
+            SELECT id, name, label, category, descr, {score} AS hits FROM classes)
+        WHERE hits > 0 ORDER BY hits DESC LIMIT ?;
         """,
-        (match, limit),
-    )
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
+        (*grams, FUZZY_CANDIDATES),
+    ).fetchall()
+
+
+def _edit_rows(conn, key: str, limit: int, deadline: float, trigram: bool = True) -> List[Dict]:
+    """Yazım hatası toleransı: trigram örtüşmesiyle aday seç, edit mesafesiyle sırala."""
+    grams = list(dict.fromkeys(key[i:i + 3] for i in range(len(key) - 2)))
+    if not grams:
+        return []
+    cap = _max_distance(key)
+    rows = _edit_candidates(conn, grams, trigram)
+    scored = []
+    for r in rows:
+        if time.perf_counter() > deadline:
+            break
+        name = r["name"].lower()
+        d = _distance(key, name, cap)
+        if d <= cap:
+            scored.append((d, len(name), r["name"], dict(r)))
+    scored.sort(key=lambda x: x[:3])
+    return [x[3] for x in scored[:limit]]
+
+
+def fuzzy_rows(q: str, limit: int = 20, exclude=(), cancelled: Optional[Callable[[], bool]] = None,
+               budget: float = FUZZY_BUDGET) -> Optional[List[Dict]]:
+    """fts_query'nin kaçırdıkları için yedek aşamalar: önce sınıf adı içinde parça
+    (trigram), hiçbir şey bulunamadıysa edit mesafesi. `exclude` önceki aşamaların
+    id'leridir; süre bütçesi dolunca o ana kadar bulunanlar döner. İptal edilirse None.
+    Trigram indeksi yoksa (SQLite < 3.34) yalnızca edit mesafesi aşaması çalışır."""
+    tokens = _tokens(q)
+    if not tokens or limit <= 0:
+        return []
+    deadline = time.perf_counter() + budget
+    seen = set(exclude)
+    out: List[Dict] = []
+
+    def add(rows):
+        for r in rows:
+            if r["id"] not in seen and len(out) < limit:
+                seen.add(r["id"]); out.append(r)
+
+    conn = get_catalog_conn()
+    conn.set_progress_handler(
+        lambda: 1 if time.perf_counter() > deadline or (cancelled is not None and cancelled()) else 0, 1000)
+    try:
+        trigram = has_trigram_index(conn)
+        if trigram:
+            add(_trgm_rows(conn, tokens, limit + len(seen)))
+        key = "".join(tokens)
+        if not seen and len(key) >= 3 and time.perf_counter() < deadline:
+            add(_edit_rows(conn, key, limit, deadline, trigram))
+    except sqlite3.OperationalError:
+        # bütçe doldu / iptal: kesilen aşamanın sonuçları atlanır
+        if cancelled is not None and cancelled():
+            return None
+        if time.perf_counter() <= deadline:
+            raise
+    finally:
+        conn.set_progress_handler(None, 0)
+        conn.close()
+    return out
+
+
+def fuzzy_query(q: str, limit: int = 20, cancelled: Optional[Callable[[], bool]] = None,
+                budget: float = FUZZY_BUDGET) -> List[Dict]:
+    """fts_query + camelCase parça / yazım hatası toleransı (sıra: FTS, trigram, edit mesafesi)."""
+    rows = fts_query(q, limit, cancelled)
+    if len(rows) < limit:
+        rows += fuzzy_rows(q, limit - len(rows), {r["id"] for r in rows}, cancelled, budget) or []
     return rows
+
+
+class SearchCache:
+    """fts_query için LRU sonuç önbelleği.
+
+    Tam (limit'e takılmamış) bir sonucu olan sorgunun uzantısı yazıldığında
+    ("bgp" → "bgp pe"), yeni sonuç eskisinin alt kümesidir; FTS'e gitmeden
+    önbellekteki satırlar süzülür. MIM yeniden yüklenince (catalog_stamp değişince)
+    önbellek boşaltılır."""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, tuple[List[Dict], bool]]" = OrderedDict()
+        self._stamp = None
+        self._checked = 0.0
+        self.hits = self.refined = self.misses = 0
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._stamp = None
+            self._checked = 0.0
+
+    def _check_stamp(self):
+        now = time.monotonic()
+        if now - self._checked < SEARCH_STAMP_TTL:
+            return
+        self._checked = now
+        stamp = catalog_stamp()
+        with self._lock:
+            if self._stamp is not None and stamp != self._stamp:
+                self._data.clear()
+            self._stamp = stamp
+
+    def _get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def _put(self, key: str, rows: List[Dict], complete: bool):
+        with self._lock:
+            self._data[key] = (rows, complete)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def query(self, q: str, limit: int = 200, cancelled: Optional[Callable[[], bool]] = None) -> Optional[List[Dict]]:
+        """fts_query ile aynı sonuç; iptal edilirse None."""
+        tokens = _tokens(q)
+        if not tokens:
+            return []
+        key = " ".join(tokens)
+        self._check_stamp()
+        entry = self._get(key)
+        if entry is not None and (entry[1] or len(entry[0]) >= limit):
+            self.hits += 1
+            return [_public(r) for r in entry[0][:limit]]
+        # en uzun tam önek sonucu varsa ondan süz
+        for i in range(len(key) - 1, 0, -1):
+            prev = self._get(key[:i])
+            if prev is None or not prev[1]:
+                continue
+            rows = [r for r in prev[0] if _text_matches(tokens, r["_text"])]
+            # önce isim eşleşmeleri; geri kalanı önekin bm25 sırasını korur
+            rows.sort(key=lambda r: _name_rank(r["name"], "".join(tokens)))
+            self.refined += 1
+            self._put(key, rows, True)
+            return [_public(r) for r in rows[:limit]]
+        self.misses += 1
+        rows = _fts_rows(tokens, limit, cancelled)
+        if rows is None:
+            return None
+        self._put(key, rows, len(rows) < limit)
+        return [_public(r) for r in rows]
+
+
+def _public(row: Dict) -> Dict:
+    return {k: v for k, v in row.items() if k != "_text"}
@@ -0,0 +1,256 @@
+# core/snapshot.py
+"""Katalog snapshot'ı: kurulmuş kataloğu tek, sıkıştırılmış, sürümlü bir dosyaya paketler.
+
+Dosya biçimi: MAGIC | header uzunluğu (4 byte, big-endian) | JSON header | zlib(SQLite imajı)
+SQLite imajı VACUUM edilmiş bir katalog DB'sidir (FTS shadow tabloları dahil); açıldıktan
+sonra doğrudan SQLite üzerinden (mmap ile) okunur, cobra kurulumu gerekmez.
+"""
+import hashlib, json, logging, os, sqlite3, tempfile, zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+from core import db
+
+MAGIC = b"SPNSNAP\x00"
+SNAPSHOT_FORMAT = 1
+
+# sıra önemli: önce ebeveyn (classes), sonra ona bağlı tablolar
+CATALOG_TABLES = db.CATALOG_TABLES
+FTS_TABLES = db.FTS_TABLES
+
+_CHUNK = 1 << 20
+
+
+def _table_names(conn, schema: str = "main") -> set[str]:
+    return {r[0] for r in conn.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type='table';")}
+
+
+def _columns(conn, table: str, schema: str = "main") -> list[str]:
+    return [r[1] for r in conn.execute(f"PRAGMA {schema}.table_info({table});")]
+
+
+def _shadow_tables(conn, fts: str, schema: str = "main") -> list[str]:
+    return sorted(
+        r[0] for r in conn.execute(
+            f"SELECT name FROM {schema}.sqlite_master WHERE type='table' AND name LIKE ? ESCAPE '\\';",
+            (fts.replace("_", "\\_") + "\\_%",),
+        )
+    )
+
+
+def export_snapshot(out_path, src=None) -> dict:
+    """Kataloğu `out_path` dosyasına yaz; header'ı döndür."""
+    src = Path(src or db.DB_PATH)
+    out_path = Path(out_path)
+    fd, tmp = tempfile.mkstemp(suffix=".db", dir=out_path.parent)
+    os.close(fd)
+    try:
+        with sqlite3.connect(src) as s, sqlite3.connect(tmp) as d:
+            s.backup(d)
+        conn = sqlite3.connect(tmp)
+        keep = set(CATALOG_TABLES)
+        for fts in FTS_TABLES:
+            keep.add(fts)
+            keep.update(_shadow_tables(conn, fts))
+        # kullanıcı/log gibi katalog dışı tablolar snapshot'a girmez
+        for name in _table_names(conn) - keep:
+            if not name.startswith("sqlite_"):
+                conn.execute(f'DROP TABLE IF EXISTS "{name}";')
+        counts = {t: conn.execute(f"SELECT COUNT(*) FROM {t};").fetchone()[0]
+                  for t in CATALOG_TABLES if t in _table_names(conn)}
+        versions = []
+        if "mim_modules" in counts:
+            versions = [r[0] for r in conn.execute("SELECT DISTINCT version FROM mim_modules WHERE version IS NOT NULL;")]
+        schema_version = conn.execute("PRAGMA user_version;").fetchone()[0]
+        conn.commit()
+        conn.execute("PRAGMA journal_mode=DELETE;")
+        conn.execute("VACUUM;")
+        conn.close()
+
+        sha = hashlib.sha256()
+        raw_size = 0
+        with open(tmp, "rb") as f:
+            for block in iter(lambda: f.read(_CHUNK), b""):
+                sha.update(block)
+                raw_size += len(block)
+        header = {
+            "format": SNAPSHOT_FORMAT,
+            "schema_version": schema_version,
+            "model_versions": versions,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "counts": counts,
+            "raw_size": raw_size,
+            "sha256": sha.hexdigest(),
+        }
+        hbytes = json.dumps(header, sort_keys=True).encode()
+        comp = zlib.compressobj(6)
+        with open(tmp, "rb") as f, open(out_path, "wb") as out:
+            out.write(MAGIC)
+            out.write(len(hbytes).to_bytes(4, "big"))
+            out.write(hbytes)
+            for block in iter(lambda: f.read(_CHUNK), b""):
+                out.write(comp.compress(block))
+            out.write(comp.flush())
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    logging.info("snapshot yazıldı: %s (%d class, %.1f MB → %.1f MB)", out_path,
+                 header["counts"].get("classes", 0), raw_size / 2**20, out_path.stat().st_size / 2**20)
+    return header
+
+
+def read_header(path) -> dict:
+    with open(path, "rb") as f:
+        return _read_header(f)
+
+
+def _read_header(f) -> dict:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Spinode snapshot dosyası değil")
+    size = int.from_bytes(f.read(4), "big")
+    header = json.loads(f.read(size))
+    if header.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"desteklenmeyen snapshot formatı: {header.get('format')}")
+    if header.get("schema_version", 0) > db.SCHEMA_VERSION:
+        raise ValueError(
+            f"snapshot şeması ({header['schema_version']}) bu sürümden yeni ({db.SCHEMA_VERSION}); uygulamayı güncelleyin"
+        )
+    return header
+
+
+def _unpack(path, dst_dir: Path) -> tuple[str, dict]:
+    fd, tmp = tempfile.mkstemp(suffix=".db", dir=dst_dir)
+    os.close(fd)
+    sha = hashlib.sha256()
+    try:
+        with open(path, "rb") as f, open(tmp, "wb") as out:
+            header = _read_header(f)
+            dec = zlib.decompressobj()
+            for block in iter(lambda: f.read(_CHUNK), b""):
+                data = dec.decompress(block)
+                sha.update(data)
+                out.write(data)
+            data = dec.flush()
+            sha.update(data)
+            out.write(data)
+        if sha.hexdigest() != header["sha256"]:
+            raise ValueError("snapshot bozuk (sha256 uyuşmuyor)")
+    except Exception:
+        os.remove(tmp)
+        raise
+    return tmp, header
+
+
+def import_snapshot(path, dst=None) -> dict:
+    """Snapshot'ı DB'ye yükle. Hedef DB yoksa imaj doğrudan DB olur (FTS hazır gelir);
+    varsa katalog tabloları değiştirilir, kullanıcı/log tabloları korunur."""
+    dst = Path(dst or db.DB_PATH)
+    tmp, header = _unpack(path, dst.parent)
+    try:
+        if not dst.exists():
+            os.replace(tmp, dst)
+        else:
+            _init_db(dst)  # hedefin şeması güncel olsun (FTS kolonları vb.)
+            _merge(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    # eksik tablolar / eski şema göçleri
+    _init_db(dst)
+    from core.graph import invalidate_graph, materialize_dn_paths
+    from core.meta_derived import invalidate_class_meta, materialize
+    if "class_templates" not in header.get("counts", {}):
+        # eski snapshot: şablonlar yok, katalogdan türet
+        _with_db(dst, materialize)
+    if "class_dn_paths" not in header.get("counts", {}):
+        _with_db(dst, materialize_dn_paths)
+    if dst.resolve() == Path(db.DB_PATH).resolve():
+        db.refresh_memory_catalog()
+    invalidate_class_meta()
+    invalidate_graph()
+    logging.info("snapshot yüklendi: %s → %s (%d class)", path, dst, header["counts"].get("classes", 0))
+    return header
+
+
+def _with_db(path: Path, fn):
+    old = db.DB_PATH
+    db.DB_PATH = path
+    try:
+        return fn()
+    finally:
+        db.DB_PATH = old
+
+
+def _init_db(path: Path):
+    _with_db(path, db.init_db)
+
+
+def _merge(snap_path: str, dst: Path):
+    conn = sqlite3.connect(dst)
+    try:
+        conn.execute("ATTACH DATABASE ? AS snap;", (snap_path,))
+        snap_tables = _table_names(conn, "snap")
+        main_tables = _table_names(conn, "main")
+        conn.execute("BEGIN;")
+        for table in reversed(CATALOG_TABLES):
+            if table in main_tables:
+                conn.execute(f"DELETE FROM main.{table};")
+        for table in CATALOG_TABLES:
+            if table not in snap_tables or table not in main_tables:
+                continue
+            cols = [c for c in _columns(conn, table, "main") if c in set(_columns(conn, table, "snap"))]
+            collist = ", ".join(cols)
+            conn.execute(f"INSERT INTO main.{table}({collist}) SELECT {collist} FROM snap.{table};")
+        for fts in FTS_TABLES:
+            _copy_fts(conn, fts, snap_tables, main_tables)
+        if "fts_dirty" in main_tables:
+            # yukarıdaki INSERT'lerin tetikleyici kayıtları: indeks zaten güncel
+            conn.execute("DELETE FROM main.fts_dirty;")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _copy_fts(conn, fts: str, snap_tables: set[str], main_tables: set[str]):
+    """Hazır FTS indeksini shadow tablolarıyla birlikte kopyala; tanımlar
+    uyuşmazsa içerikten yeniden kur."""
+    if fts not in main_tables:
+        return
+    shadows = _shadow_tables(conn, fts, "snap")
+    same_sql = (
+        conn.execute("SELECT sql FROM main.sqlite_master WHERE name=?;", (fts,)).fetchone()
+        == conn.execute("SELECT sql FROM snap.sqlite_master WHERE name=?;", (fts,)).fetchone()
+    )
+    if same_sql and shadows and shadows == _shadow_tables(conn, fts, "main"):
+        for shadow in shadows:
+            conn.execute(f"DELETE FROM main.{shadow};")
+            conn.execute(f"INSERT INTO main.{shadow} SELECT * FROM snap.{shadow};")
+        conn.execute(f"INSERT INTO {fts}({fts}) VALUES('integrity-check');")
+    elif fts == "class_fts":
+        # şema farklı (ör. eski tek kolonlu FTS): kopyalanmış katalogdan yeniden kur
+        conn.execute(f"DELETE FROM main.{fts};")
+        conn.execute(db.fts_insert_sql())
+    else:
+        # external-content tablolar içerik tablosundan yeniden kurulur
+        conn.execute(f"INSERT INTO main.{fts}({fts}) VALUES('rebuild');")
+
+
+def bootstrap(path=None) -> bool:
+    """Katalog boşsa snapshot'tan doldur (TUI açılışı için).
+    path verilmezse SPINODE_SNAPSHOT ortam değişkeni ya da DB yanındaki spinode.snap denenir."""
+    path = Path(path or os.environ.get("SPINODE_SNAPSHOT") or Path(db.DB_PATH).with_suffix(".snap"))
+    if not path.exists():
+        return False
+    if Path(db.DB_PATH).exists():
+        conn = db.get_conn()
+        try:
+            has = "classes" in _table_names(conn) and conn.execute("SELECT 1 FROM classes LIMIT 1;").fetchone()
+        finally:
+            conn.close()
+        if has:
+            return False
+    import_snapshot(path)
+    return True
@@ -0,0 +1,344 @@
+"""Spinode performans ölçümleri (önce/sonra karşılaştırmaları).
+
+    python -m scripts.bench relations [--db spinode.db]
+"""
+import argparse, os, sqlite3, tempfile, time
+from pathlib import Path
+
+from core import db
+
+
+def _copy_db(src: Path) -> str:
+    """DB'nin geçici bir kopyasını al (ölçümler asıl DB'yi değiştirmesin)."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    with sqlite3.connect(src) as s, sqlite3.connect(path) as d:
+        s.backup(d)
+    return path
+
+
+def _drop_db(path: str):
+    db.close_all()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _report(title: str, rows: list[tuple[str, float, str]]):
+    print(f"\n{title}")
+    print(f"  {'case':<34}{'time':>12}  note")
+    for name, secs, note in rows:
+        print(f"  {name:<34}{secs * 1000:>10.3f}ms  {note}")
+
+
+def bench_relations(src: Path):
+    from core.mim_loader import resolve_relations
+
+    rows = []
+    # önce: satır başına SELECT + UPDATE, dst_name index'i yok
+    path = _copy_db(src)
+    conn = sqlite3.connect(path); cur = conn.cursor()
+    for ix in ("idx_rel_dst_name", "idx_rel_type_src"):
+        cur.execute(f"DROP INDEX IF EXISTS {ix};")
+    cur.execute("UPDATE relations SET dst_class_id=NULL;"); conn.commit()
+    t0 = time.perf_counter()
+    cur.execute("SELECT id, dst_name FROM relations WHERE dst_class_id IS NULL AND dst_name IS NOT NULL;")
+    n = 0
+    for rel_id, dst_name in cur.fetchall():
+        # aynı eşleme: 'cobra.model.fv.AEPg' -> 'fvAEPg'
+        if dst_name.startswith("cobra.model."):
+            dst_name = dst_name[12:].replace(".", "")
+        cur.execute("SELECT id FROM classes WHERE name=?", (dst_name,))
+        row = cur.fetchone()
+        if row:
+            cur.execute("UPDATE relations SET dst_class_id=? WHERE id=?", (row[0], rel_id))
+            n += 1
+    conn.commit()
+    rows.append(("per-row SELECT/UPDATE", time.perf_counter() - t0, f"{n} çözüldü"))
+    conn.close(); os.remove(path)
+
+    # sonra: temp tablo + tek UPDATE, index'ler mevcut
+    path = _copy_db(src)
+    db.DB_PATH = Path(path)
+    db.init_db()
+    conn = db.get_conn()
+    conn.execute("UPDATE relations SET dst_class_id=NULL;"); conn.commit()
+    t0 = time.perf_counter()
+    n = resolve_relations(conn)
+    rows.append(("set-based resolve_relations", time.perf_counter() - t0, f"{n} çözüldü"))
+    total = conn.execute("SELECT COUNT(*) FROM relations;").fetchone()[0]
+    conn.close(); _drop_db(path)
+    _report(f"relation resolution ({total} relations)", rows)
+
+
+def _fresh_conn():
+    # eski get_conn(): her çağrıda yeni bağlantı
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys=ON;")
+    return conn
+
+
+def _time_calls(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n
+
+
+def bench_conn(src: Path, n: int = 300):
+    from core import search, meta_derived, diagram, graph, audit
+
+    path = _copy_db(src)
+    db.DB_PATH = Path(path)
+    db.init_db()
+    audit.init_audit()
+    conn = db.get_conn()
+    row = conn.execute("SELECT name FROM classes ORDER BY id LIMIT 1;").fetchone()
+    conn.close()
+    cls = row[0] if row else "fvAEPg"
+    q = cls[:3]
+    helpers = {
+        "fts_query": lambda: search.fts_query(q, limit=200),
+        "load_class_meta": lambda: meta_derived._load_class_meta(cls),
+        "neighbors_of": lambda: diagram.neighbors_of(cls),
+        "log_query_run": lambda: audit.log_query_run("bench", cls, "moquery -c " + cls),
+    }
+    patched = [(search, "get_catalog_conn"), (meta_derived, "get_catalog_conn"),
+               (graph, "get_catalog_conn"), (audit, "get_conn")]
+    pooled = {m: getattr(m, attr) for m, attr in patched}
+    rows = []
+    for name, fn in helpers.items():
+        for m, attr in patched:
+            setattr(m, attr, _fresh_conn)
+        before = _time_calls(fn, n)
+        for m, attr in patched:
+            setattr(m, attr, pooled[m])
+        after = _time_calls(fn, n)
+        rows.append((f"{name} (yeni bağlantı)", before, ""))
+        rows.append((f"{name} (havuz)", after, f"x{before / after:.1f}" if after else ""))
+    _drop_db(path)
+    _report(f"hot helpers, çağrı başına ({n} çağrı, class={cls})", rows)
+
+
+def _catalog_helpers(cls: str) -> dict:
+    from core import search, meta_derived, diagram
+    return {
+        "fts_query": lambda: search.fts_query(cls[:3], limit=200),
+        "load_class_meta": lambda: meta_derived._load_class_meta(cls),
+        "neighbors_of": lambda: diagram.neighbors_of(cls),
+    }
+
+
+def bench_memory(src: Path, n: int = 300):
+    path = _copy_db(src)
+    db.DB_PATH = Path(path)
+    db.init_db()  # eski şemalı kopyada türetilmiş tablolar (class_templates vb.) yok
+    conn = db.get_conn()
+    row = conn.execute("SELECT name FROM classes ORDER BY id LIMIT 1;").fetchone()
+    conn.close()
+    cls = row[0] if row else "fvAEPg"
+    helpers = _catalog_helpers(cls)
+    before = {name: _time_calls(fn, n) for name, fn in helpers.items()}
+    startup = db.enable_memory_catalog()
+    rows = [("in-memory kopya (açılış)", startup, "")]
+    for name, fn in helpers.items():
+        after = _time_calls(fn, n)
+        rows.append((f"{name} (dosya)", before[name], ""))
+        rows.append((f"{name} (in-memory)", after, f"x{before[name] / after:.1f}" if after else ""))
+    db.disable_memory_catalog()
+    _drop_db(path)
+    _report(f"katalog okumaları, çağrı başına ({n} çağrı, class={cls})", rows)
+
+
+def bench_fts(src: Path, n: int = 200):
+    from core import search
+
+    path = _copy_db(src)
+    db.DB_PATH = Path(path)
+    db.init_db()
+    # havuz dışı bağlantı: havuzdaki bağlantı ölçülen fts_query'ye kalır (tutulursa her çağrı
+    # iç içe kullanım olur ve yeni bağlantı açar)
+    conn = db.connect()
+    # önce: tek 'content' kolonu, prefix indeksi yok, sıralama yok
+    conn.execute("CREATE VIRTUAL TABLE old_fts USING fts5(content, tokenize='unicode61');")
+    cols = " || ' ' || ".join(db.FTS_COLUMNS)
+    conn.execute(f"INSERT INTO old_fts(rowid, content) SELECT rowid, {cols} FROM class_fts;")
+    conn.commit()
+    names = [r[0] for r in conn.execute(
+        "SELECT name FROM classes WHERE name IN ('fvAEPg','fvTenant','l3extOut','bgpPeerP','fvBD') "
+        "UNION ALL SELECT name FROM (SELECT name FROM classes ORDER BY id LIMIT 3);")]
+
+    def old_query(q: str, limit: int = 20) -> list[str]:
+        match = " ".join(f"{t}*" for t in search._tokens(q))
+        return [r[0] for r in conn.execute(
+            "SELECT c.name FROM old_fts f JOIN classes c ON c.id = f.rowid "
+            "WHERE f.content MATCH ? LIMIT ?;", (match, limit))]
+
+    def new_query(q: str, limit: int = 20) -> list[str]:
+        return [r["name"] for r in search.fts_query(q, limit=limit)]
+
+    def rank(found: list[str], name: str) -> str:
+        return f"#{found.index(name) + 1}" if name in found else "ilk 20'de yok"
+
+    rows = []
+    for name in dict.fromkeys(names):
+        for q in (name, name[:3]):
+            t_old = _time_calls(lambda: old_query(q), n)
+            t_new = _time_calls(lambda: new_query(q), n)
+            rows.append((f"{q!r} (tek kolon)", t_old, f"{name} {rank(old_query(q), name)}"))
+            rows.append((f"{q!r} (bm25+prefix)", t_new, f"{name} {rank(new_query(q), name)}"))
+    conn.close()
+    _drop_db(path)
+    _report(f"FTS sorgusu, çağrı başına ({n} çağrı, limit=20)", rows)
+
+
+def bench_fuzzy(src: Path, n: int = 20):
+    import random
+    from core import search
+
+    path = _copy_db(src)
+    db.DB_PATH = Path(path)
+    db.init_db()
+    conn = db.get_conn()
+    names = [r[0] for r in conn.execute("SELECT name FROM classes WHERE length(name) >= 8 ORDER BY random() LIMIT 6;")]
+    conn.close()
+    rng = random.Random(0)
+    rows = []
+    for name in names:
+        i = rng.randrange(1, len(name) - 2)
+        typo = name[:i] + name[i + 1] + name[i] + name[i + 2:]
+        for q in (name[2:-2], typo):
+            found = [r["name"] for r in search.fuzzy_query(q, limit=20)]
+            note = f"{name} #{found.index(name) + 1}" if name in found else f"{name} yok"
+            rows.append((repr(q), _time_calls(lambda: search.fuzzy_query(q, limit=20), n), note))
+    _drop_db(path)
+    worst = max(r[1] for r in rows) if rows else 0
+    _report(f"fuzzy_query, çağrı başına ({n} çağrı; bütçe {search.FUZZY_BUDGET * 1000:.0f} ms + FTS, "
+            f"en kötü {worst * 1000:.1f} ms)", rows)
+
+
+def bench_reverse(src: Path, n: int = 100):
+    from core import search
+
+    path = _copy_db(src)
+    db.DB_PATH = Path(path)
+    conn = db.connect()  # havuz dışı: reverse_query havuzdaki bağlantıyı kullanır
+    for ix in ("idx_props_name_nocase", "idx_prop_enums_const_nocase"):
+        conn.execute(f"DROP INDEX IF EXISTS {ix};")
+    terms = [("prop", r[0]) for r in conn.execute(
+        "SELECT name FROM props GROUP BY name ORDER BY COUNT(*) DESC LIMIT 3;")]
+    terms += [("enum", r[0]) for r in conn.execute(
+        "SELECT const_name FROM prop_enums GROUP BY const_name ORDER BY COUNT(*) DESC LIMIT 2;")]
+    terms += [("prop", "n"), ("prop", "zzz")]
+
+    def scan(kind: str, term: str):
+        # önce: index'siz LIKE taraması + tüm eşleşmeleri gruplayıp sıralama
+        table, col = ("props", "name") if kind == "prop" else ("prop_enums", "const_name")
+        return conn.execute(
+            f"SELECT c.name FROM {table} x JOIN classes c ON c.id = x.class_id "
+            f"WHERE x.{col} LIKE ? GROUP BY c.id ORDER BY c.name LIMIT 200;", (term + "%",)).fetchall()
+
+    before = {t: _time_calls(lambda: scan(*t), n) for t in terms}
+    db.init_db()  # index'ler
+    rows = []
+    for kind, term in terms:
+        hits = len(search.reverse_query(term, kind))
+        rows.append((f"{kind}:{term} (LIKE tarama)", before[(kind, term)], ""))
+        rows.append((f"{kind}:{term} (reverse_query)", _time_calls(lambda: search.reverse_query(term, kind), n),
+                     f"{hits} sınıf"))
+    conn.close()
+    _drop_db(path)
+    _report(f"prop/enum → sınıf, çağrı başına ({n} çağrı, limit=200)", rows)
+
+
+def bench_meta(src: Path, n: int = 200):
+    from core import meta_derived
+
+    path = _copy_db(src)
+    db.DB_PATH = Path(path)
+    db.init_db()
+    conn = db.get_conn()
+    row = conn.execute(
+        "SELECT c.name FROM classes c JOIN props p ON p.class_id = c.id GROUP BY c.id ORDER BY COUNT(*) DESC LIMIT 1;"
+    ).fetchone()
+    conn.close()
+    cls = row[0] if row else "fvAEPg"
+
+    def open_uncached():
+        # önce: on_show sorgusu + get_prop_info + pipeline/template türetimi için 2 kez daha
+        for _ in range(3):
+            meta_derived.invalidate_class_meta()
+            meta_derived.get_prop_info(cls)
+
+    def open_cached():
+        meta_derived.get_prop_info(cls)
+        meta_derived.derive_pipeline_options(cls)
+        meta_derived.derive_templates(cls)
+
+    rows = [("Builder açılışı (önbelleksiz)", _time_calls(open_uncached, n), "3 yükleme")]
+    meta_derived.invalidate_class_meta()
+    t0 = time.perf_counter(); open_cached(); first = time.perf_counter() - t0
+    rows.append(("Builder açılışı (ilk, ClassMeta)", first, "1 yükleme"))
+    rows.append(("Builder açılışı (sonraki)", _time_calls(open_cached, n), "önbellekten"))
+    _drop_db(path)
+    _report(f"sınıf metası, açılış başına ({n} açılış, class={cls})", rows)
+
+
+def bench_graph(src: Path, n: int = 20):
+    from core import graph
+
+    path = _copy_db(src)
+    db.DB_PATH = Path(path)
+    conn = db.get_conn()
+    roots = [r[0] for r in conn.execute(
+        "SELECT c.name FROM classes c JOIN relations r ON r.src_class_id = c.id AND r.rel_type = 'child' "
+        "GROUP BY c.id ORDER BY COUNT(*) DESC LIMIT 3;")]
+
+    def sql_bfs(root: str, depth: int) -> int:
+        # önce: düğüm başına bir SQL (neighbors_of'un eski sorgusu)
+        seen, frontier, edges = {root}, [root], 0
+        for _ in range(depth):
+            nxt = []
+            for name in frontier:
+                for (dst,) in conn.execute(
+                    "SELECT COALESCE(c2.name, r.dst_name) FROM relations r "
+                    "JOIN classes c1 ON c1.id = r.src_class_id LEFT JOIN classes c2 ON c2.id = r.dst_class_id "
+                    "WHERE c1.name = ? AND r.rel_type = 'child' ORDER BY 1;", (name,)):
+                    edges += 1
+                    if dst not in seen:
+                        seen.add(dst); nxt.append(dst)
+            frontier = nxt
+        return edges
+
+    t0 = time.perf_counter()
+    g = graph.RelGraph.build(conn)
+    rows = [("graf kurulumu", time.perf_counter() - t0, f"{len(g.names)} düğüm")]
+    for root in roots:
+        for depth in (1, 3, 6):
+            edges = len(g.bfs(root, depth, ("child",)))
+            rows.append((f"{root} d={depth} (SQL/düğüm)", _time_calls(lambda: sql_bfs(root, depth), n), ""))
+            rows.append((f"{root} d={depth} (CSR bfs)", _time_calls(lambda: g.bfs(root, depth, ("child",)), n),
+                         f"{edges} kenar"))
+    conn.close()
+    _drop_db(path)
+    _report(f"child alt ağacı, çağrı başına ({n} çağrı)", rows)
+
+
+BENCHES = {
+    "relations": bench_relations,
+    "conn": bench_conn,
+    "memory": bench_memory,
+    "fts": bench_fts,
+    "fuzzy": bench_fuzzy,
+    "reverse": bench_reverse,
+    "meta": bench_meta,
+    "graph": bench_graph,
+}
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Spinode benchmark'ları")
+    ap.add_argument("bench", choices=sorted(BENCHES))
+    ap.add_argument("--db", type=Path, default=db.DB_PATH, help="ölçülecek DB (kopyası kullanılır)")
+    args = ap.parse_args()
+    BENCHES[args.bench](args.db)
@@ -0,0 +1,21 @@
+import argparse
+from pathlib import Path
+
+from core import db
+from core.exporters import FORMATS, SUBTREE_DEPTH, export_graph, format_for
+from core.graph import REL_TYPES
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="İlişki grafını Mermaid / Graphviz DOT / GraphML dosyasına aktar")
+    ap.add_argument("path", help="çıktı dosyası (.mmd, .dot/.gv, .graphml)")
+    ap.add_argument("-f", "--format", choices=FORMATS, help="varsayılan: dosya uzantısından")
+    ap.add_argument("--rel", action="append", choices=REL_TYPES, help="yalnızca bu rel_type (tekrarlanabilir)")
+    ap.add_argument("--package", action="append", help="kaynak sınıf paketi: 'fv' tam, 'fv*' önek (tekrarlanabilir)")
+    ap.add_argument("--root", help="yalnızca bu sınıfın alt ağacı")
+    ap.add_argument("--depth", type=int, default=SUBTREE_DEPTH, help="alt ağaç derinliği")
+    ap.add_argument("--db", type=Path, default=db.DB_PATH)
+    args = ap.parse_args()
+    db.DB_PATH = args.db
+    fmt = args.format or format_for(args.path)
+    stats = export_graph(args.path, fmt, args.rel, args.package, args.root, args.depth)
+    print(f"{fmt} yazıldı: {args.path} ({stats.get('nodes', '-')} düğüm, {stats['edges']} kenar)")
@@ -0,0 +1,19 @@
+import argparse
+from pathlib import Path
+
+from core import db
+from core.captures import CAPTURE_BATCH, load_capture
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="moquery çıktısı yakalamalarını (düz / .gz) spinode.db'ye yükle")
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--source", help="kaynak etiketi (ör. APIC adı); varsayılan: dosya yolu")
+    ap.add_argument("--batch", type=int, default=CAPTURE_BATCH, help="yazma başına MO sayısı")
+    ap.add_argument("--db", type=Path, default=db.DB_PATH)
+    args = ap.parse_args()
+    db.DB_PATH = args.db
+    for path in args.paths:
+        s = load_capture(path, args.source, args.batch)
+        rate = s["objects"] / s["seconds"] * 60 if s["seconds"] else 0
+        print(f"{path}: {s['objects']} MO, {s['classes']} sınıf, {s['skipped']} atlandı, "
+              f"{s['seconds']:.1f} s ({rate:,.0f} MO/dk)")
@@ -1,6 +1,17 @@
-from core.mim_loader import load_all
+import argparse
+from core.mim_loader import load_all, BACKENDS
 
 if __name__ == "__main__":
-    load_all()
+    ap = argparse.ArgumentParser(description="Cobra MIM'i spinode.db'ye yükle")
+    ap.add_argument("-j", "--workers", type=int, default=1, help="paralel çıkarım için process sayısı")
+    ap.add_argument("--batch", type=int, default=2000, help="transaction başına class sayısı")
+    ap.add_argument("--force", action="store_true", help="parmak izlerini yok say, tüm modülleri yeniden yükle")
+    ap.add_argument("--backend", choices=BACKENDS, default="import",
+                    help="import: modülleri import et; ast: kaynakları import etmeden ayrıştır")
+    ap.add_argument("--stream", action="store_true",
+                    help="bellek sınırlı mod: paket paket yükle, modülleri bellekten at")
+    ap.add_argument("--max-rss-mb", type=float, default=None, help="--stream ile RSS tavanı (MB)")
+    args = ap.parse_args()
+    load_all(workers=args.workers, batch_size=args.batch, force=args.force, backend=args.backend,
+             stream=args.stream, max_rss_mb=args.max_rss_mb)
     print("MIM load OK")
-
@@ -1,4 +1,6 @@
-from core.db import get_conn, init_db, rebuild_fts
+from core.db import get_conn, init_db, sync_fts
+from core.meta_derived import materialize
+from core.graph import materialize_dn_paths
 
 init_db()
 conn = get_conn(); cur = conn.cursor()
@@ -28,5 +30,7 @@ for name, label, category, descr, props in data:
         cur.execute("INSERT INTO props(class_id,name,descr) VALUES(?, ?, ?)", (cid, pname, pdesc))
 
 conn.commit(); conn.close()
-rebuild_fts()
+sync_fts()
+materialize()
+materialize_dn_paths()
 print("Demo veriler yüklendi ve FTS güncellendi.")
\ No newline at end of file
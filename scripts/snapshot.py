@@ -0,0 +1,18 @@
+import argparse, json
+from core.snapshot import export_snapshot, import_snapshot, read_header
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Katalog snapshot'ı al / yükle (cobra gerekmez)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("export", help="spinode.db kataloğunu dosyaya paketle").add_argument("path")
+    sub.add_parser("import", help="snapshot'ı spinode.db'ye yükle").add_argument("path")
+    sub.add_parser("info", help="snapshot header'ını göster").add_argument("path")
+    args = ap.parse_args()
+    if args.cmd == "export":
+        h = export_snapshot(args.path)
+        print(f"Snapshot yazıldı: {args.path} ({h['counts'].get('classes', 0)} class)")
+    elif args.cmd == "import":
+        h = import_snapshot(args.path)
+        print(f"Snapshot yüklendi: {h['counts'].get('classes', 0)} class")
+    else:
+        print(json.dumps(read_header(args.path), indent=2))
@@ -0,0 +1 @@
+# test stand-in for the cobra SDK (tests/test_mim_ast.py)
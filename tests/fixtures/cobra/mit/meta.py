@@ -0,0 +1,58 @@
+class _ClassContainer:
+    def __init__(self):
+        self.classNames = []
+
+    def add(self, name):
+        self.classNames.append(name)
+
+
+class _PropSet(dict):
+    def add(self, name, pmeta):
+        self[name] = pmeta
+
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+
+class ClassMeta:
+    def __init__(self, className):
+        self.className = className
+        self.moClassName = self.label = self.category = self.rnFormat = None
+        self.props = _PropSet()
+        self.namingProps = []
+        self.childClasses = _ClassContainer()
+        self.parentClasses = _ClassContainer()
+        self.superClasses = _ClassContainer()
+        self.childNamesAndRnPrefix = []
+        self.deploymentQueryPaths = []
+
+
+class SourceRelationMeta(ClassMeta):
+    def __init__(self, className, targetClass):
+        ClassMeta.__init__(self, className)
+        self.targetClass = targetClass
+
+
+class PropMeta:
+    def __init__(self, typeName, name, moPropName, id, category):
+        self.typeName = typeName
+        self.name = name
+        self.moPropName = moPropName
+        self.id = id
+        self.category = category
+        self.isNaming = self.isConfig = False
+        self.regex = self.label = None
+        self._constants = {}
+
+    def _addConstant(self, name, label, value):
+        self._constants[name] = (label, value)
+
+
+class DeploymentPathMeta:
+    def __init__(self, name, descr, targetClass):
+        self.name = name
+        self.descr = descr
+        self.targetClass = targetClass
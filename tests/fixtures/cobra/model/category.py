@@ -0,0 +1,15 @@
+class _Category:
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class MoCategory:
+    REGULAR = _Category("REGULAR")
+    RELATIONSHIP_TO_LOCAL = _Category("RELATIONSHIP_TO_LOCAL")
+
+
+class PropCategory:
+    REGULAR = _Category("REGULAR")
@@ -0,0 +1 @@
+from cobra.modelimpl.fv.bd import BD
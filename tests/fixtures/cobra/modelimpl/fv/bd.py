@@ -0,0 +1,41 @@
+# coding=UTF-8
+from cobra.mit.meta import ClassMeta
+from cobra.mit.meta import PropMeta
+from cobra.mit.meta import DeploymentPathMeta
+from cobra.model.category import MoCategory, PropCategory
+from cobra.mit.mo import Mo
+
+
+class BD(Mo):
+    """
+    The BD object.
+
+    """
+
+    meta = ClassMeta("cobra.model.fv.BD")
+
+    meta.moClassName = "fvBD"
+    meta.rnFormat = "BD-%(name)s"
+    meta.category = MoCategory.REGULAR
+    meta.label = "Bridge Domain"
+
+    meta.childClasses.add("cobra.model.fv.RsBd")
+    meta.parentClasses.add("cobra.model.fv.Tenant")
+
+    prop = PropMeta("str", "name", "name", 1, PropCategory.REGULAR)
+    prop.isConfig = True
+    prop.isNaming = True
+    prop.regex = ['[a-zA-Z0-9_.:-]+']
+    meta.props.add("name", prop)
+
+    prop = PropMeta("str", "unicastRoute", "unicastRoute", 2, PropCategory.REGULAR)
+    prop._addConstant("no", "no", False)
+    prop._addConstant("yes", "yes", True)
+    meta.props.add("unicastRoute", prop)
+
+    meta.namingProps.append(getattr(meta.props, "name"))
+
+    meta.deploymentQueryPaths.append(DeploymentPathMeta("BDToEPg", "EPGs", "cobra.model.fv.AEPg"))
+
+    def __init__(self, parentMoOrDn, name, markDirty=True, **creationProps):
+        Mo.__init__(self, parentMoOrDn, markDirty, name, **creationProps)
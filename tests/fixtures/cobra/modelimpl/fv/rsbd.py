@@ -0,0 +1,31 @@
+# coding=UTF-8
+import cobra.model.fv
+from cobra.mit.meta import SourceRelationMeta
+from cobra.mit.meta import PropMeta
+from cobra.mit.meta import DeploymentPathMeta
+from cobra.model.category import MoCategory, PropCategory
+from cobra.mit.mo import Mo
+
+
+class RsBd(Mo):
+    """
+    Relation to a bridge domain; the target is a class reference, not a string.
+
+    """
+
+    meta = SourceRelationMeta("cobra.model.fv.RsBd", cobra.model.fv.BD)
+
+    meta.moClassName = "fvRsBd"
+    meta.rnFormat = "rsbd"
+    meta.category = MoCategory.RELATIONSHIP_TO_LOCAL
+    meta.label = "Bridge Domain"
+    # ast backend'inin desteklemediği ifade: atlanır (yalnızca çıkarılmayan alanlar)
+    meta.writeAccessMask = 0x1 | 0x2
+
+    meta.parentClasses.add("cobra.model.fv.BD")
+
+    prop = PropMeta("str", "tnFvBDName", "tnFvBDName", 1, PropCategory.REGULAR)
+    prop.isConfig = True
+    meta.props.add("tnFvBDName", prop)
+
+    meta.deploymentQueryPaths.append(DeploymentPathMeta("RsBdToBD", "Bridge Domain", cobra.model.fv.BD))
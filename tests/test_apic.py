@@ -0,0 +1,138 @@
+import json, threading, urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.apic import ApicClient, apply_pipeline, condition_filter, query_target_filter
+from core.moquery import Condition
+
+MOS = [{"dn": f"uni/tn-t{i:02d}", "name": f"t{i:02d}", "descr": "odd" if i % 2 else "even"} for i in range(30)]
+
+
+class FakeApic(BaseHTTPRequestHandler):
+    """aaaLogin + sayfalı /api/class/<class>.json. state["expire_on"]: o numaralı GET'te
+    oturum düşer (401), istemci yeniden giriş yapmalı."""
+    protocol_version = "HTTP/1.1"
+    state: dict = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, code, obj, cookie=None):
+        body = json.dumps(obj).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if cookie:
+            self.send_header("Set-Cookie", cookie)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        st = self.state
+        st["logins"] += 1
+        st["token"] = f"tok{st['logins']}"
+        self._send(200, {"imdata": []}, f"APIC-cookie={st['token']}; Path=/")
+
+    def do_GET(self):
+        st = self.state
+        st["gets"] += 1
+        if st["gets"] == st.get("expire_on"):
+            st["token"] = None
+        if f"APIC-cookie={st['token']}" not in (self.headers.get("Cookie") or ""):
+            return self._send(401, {"imdata": []})
+        url = urllib.parse.urlparse(self.path)
+        q = dict(urllib.parse.parse_qsl(url.query))
+        st["queries"].append(q)
+        mos = MOS
+        if q.get("query-target-filter") == 'wcard(fvTenant.descr,"odd")':
+            mos = [m for m in MOS if m["descr"] == "odd"]
+        page, size = int(q["page"]), int(q["page-size"])
+        self._send(200, {"totalCount": str(len(mos)),
+                         "imdata": [{"fvTenant": {"attributes": m}} for m in mos[page * size:(page + 1) * size]]})
+
+
+@pytest.fixture
+def apic():
+    FakeApic.state = {"logins": 0, "gets": 0, "token": None, "queries": []}
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), FakeApic)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    client = ApicClient(f"http://127.0.0.1:{srv.server_address[1]}", "admin", "pw", page_size=10)
+    yield client, FakeApic.state
+    client.close()
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_filter_strings():
+    assert condition_filter("fvTenant", Condition("name", "exact", "common")) == 'eq(fvTenant.name,"common")'
+    assert condition_filter("fvTenant", Condition("name", "startswith", "prod")) == 'wcard(fvTenant.name,"^prod")'
+    assert condition_filter("fvTenant", Condition("name", "in", "a, b,a")) == \
+        'or(eq(fvTenant.name,"a"),eq(fvTenant.name,"b"))'
+    assert query_target_filter("fvTenant", [Condition("name", "contains", "x"), Condition("descr", "regex", "y|z")]) == \
+        'and(wcard(fvTenant.name,"x"),wcard(fvTenant.descr,"y|z"))'
+    assert query_target_filter("fvTenant", []) == ""
+
+
+@pytest.mark.parametrize("cond", [
+    Condition("descr", "exact", 'say "hi"'),
+    Condition("descr", "contains", 'a"),eq(fvTenant.name,"x'),
+    Condition("name", "exact", "web)"),
+    Condition("name", "in", "a,b)"),
+    Condition("name", "regex", "web)"),
+])
+def test_filter_rejects_breaking_values(cond):
+    with pytest.raises(ValueError):
+        condition_filter("fvTenant", cond)
+
+
+def test_filter_keeps_regex_groups():
+    assert condition_filter("fvTenant", Condition("name", "regex", "^(web|db)-[0-9]+$")) == \
+        'wcard(fvTenant.name,"^(web|db)-[0-9]+$")'
+
+
+def test_bad_value_fails_before_any_request(apic):
+    client, st = apic
+    with pytest.raises(ValueError):
+        list(client.run("fvTenant", [Condition("name", "exact", 'x"')]))
+    assert st["gets"] == 0
+
+
+def test_pages_stop_on_total_count_with_one_login(apic):
+    client, st = apic
+    dns = [r["dn"] for r in client.class_query("fvTenant")]
+    assert dns == [m["dn"] for m in MOS]
+    # 30 MO / 10'luk sayfa: son sayfa dolu, boş 4. sayfa istenmez
+    assert [q["page"] for q in st["queries"]] == ["0", "1", "2"]
+    assert all(q["page-size"] == "10" and q["order-by"] == "fvTenant.dn" for q in st["queries"])
+    assert st["logins"] == 1
+    # oturum sorgular arasında da yeniden kullanılır
+    list(client.class_query("fvTenant"))
+    assert st["logins"] == 1
+
+
+def test_filter_is_sent(apic):
+    client, st = apic
+    recs = list(client.class_query("fvTenant", [Condition("descr", "contains", "odd")]))
+    assert len(recs) == 15
+    assert st["queries"][0]["query-target-filter"] == 'wcard(fvTenant.descr,"odd")'
+    assert [q["page"] for q in st["queries"]] == ["0", "1"]
+
+
+def test_relogin_once_on_401(apic):
+    client, st = apic
+    st["expire_on"] = 2  # ikinci sayfada oturum düşer
+    assert len(list(client.class_query("fvTenant"))) == 30
+    assert st["logins"] == 2
+    assert st["gets"] == 4
+    assert [q["page"] for q in st["queries"]] == ["0", "1", "2"]
+
+
+def test_run_pipeline(apic):
+    client, _ = apic
+    out = list(client.run("fvTenant", [Condition("descr", "contains", "odd")], greps=['"^name"'], sort_unique=True))
+    assert out == sorted(f"name  : t{i:02d}" for i in range(1, 30, 2))
+    lines = ["# fv.Tenant", "dn : a", "dn : a", "name : x", "dn : b"]
+    assert list(apply_pipeline(lines, greps=["'^dn'"], uniq=True)) == ["dn : a", "dn : b"]
+    assert list(apply_pipeline(lines, greps=['"dn\\|name"'], sort_unique=True)) == ["dn : a", "dn : b", "name : x"]
@@ -0,0 +1,161 @@
+import dataclasses, socket, threading, time
+
+import pytest
+
+paramiko = pytest.importorskip("paramiko")
+pytest.importorskip("netmiko")
+
+from core.netops import Host, SshPool
+
+KEY = paramiko.RSAKey.generate(2048)
+PASSWORD = "pw"
+
+
+class _Server(paramiko.ServerInterface):
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL if password == PASSWORD else paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_channel_pty_request(self, *args):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        return True
+
+
+def _shell(ch, name):
+    """'name# ' istemli, girdiyi yankılayan kabuk; moquery'ye üç dn satırı döner."""
+    prompt = f"{name}# "
+    ch.send(prompt.encode())
+    buf = b""
+    while True:
+        data = ch.recv(1024)
+        if not data:
+            return
+        ch.send(data)
+        buf += data
+        while b"\n" in buf or b"\r" in buf:
+            i = min(x for x in (buf.find(b"\n"), buf.find(b"\r")) if x >= 0)
+            line, buf = buf[:i].decode().strip(), buf[i + 1:].lstrip(b"\r\n")
+            if line.startswith("moquery"):
+                ch.send(("\r\n" + "\r\n".join(f"dn : uni/tn-{name}-{k}" for k in range(3)) + "\r\n").encode())
+            ch.send(("\r\n" + prompt).encode())
+
+
+class FakeSwitch:
+    def __init__(self, name):
+        self.name = name
+        self.conns = 0
+        self.transports = []
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(8)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def _loop(self):
+        while True:
+            try:
+                c, _ = self.sock.accept()
+            except OSError:
+                return
+            self.conns += 1
+            t = paramiko.Transport(c)
+            t.add_server_key(KEY)
+            t.start_server(server=_Server())
+            self.transports.append(t)
+            threading.Thread(target=self._accept, args=(t,), daemon=True).start()
+
+    def _accept(self, t):
+        ch = t.accept(20)
+        if ch is not None:
+            _shell(ch, self.name)
+
+    def drop_sessions(self):
+        for t in self.transports:
+            t.close()
+
+    def close(self):
+        self.drop_sessions()
+        self.sock.close()
+
+
+@pytest.fixture
+def switches():
+    made = [FakeSwitch(f"leaf{i}") for i in range(2)]
+    yield made
+    for s in made:
+        s.close()
+
+
+def _host(sw, **kw):
+    kw.setdefault("password", PASSWORD)
+    return Host("127.0.0.1", "admin", port=sw.port, device_type="linux", timeout=10, **kw)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+CMD = "moquery -c fvTenant | grep dn"
+
+
+def test_connection_reused(switches):
+    sw = switches[0]
+    with SshPool(max_workers=2, connect_timeout=5) as pool:
+        for _ in range(3):
+            (res,) = pool.run([_host(sw)], CMD)
+            assert res.ok, res.error
+            assert "dn : uni/tn-leaf0-2" in res.output
+        assert sw.conns == 1
+        st = pool.stats()[f"admin@127.0.0.1:{sw.port}"]
+        assert st["runs"] == 3 and st["connects"] == 1 and st["errors"] == 0
+
+
+def test_reconnect_once_after_drop(switches):
+    sw = switches[0]
+    with SshPool(max_workers=2, connect_timeout=5) as pool:
+        (res,) = pool.run([_host(sw)], CMD)
+        assert res.ok and not res.reconnected
+        sw.drop_sessions()
+        time.sleep(0.2)
+        (res,) = pool.run([_host(sw)], CMD)
+        assert res.ok, res.error
+        assert res.reconnected
+        assert sw.conns == 2
+
+
+def test_changed_password_is_not_served_by_old_connection(switches):
+    sw = switches[0]
+    with SshPool(max_workers=2, connect_timeout=5) as pool:
+        (res,) = pool.run([_host(sw)], CMD)
+        assert res.ok
+        (res,) = pool.run([dataclasses.replace(_host(sw), password="wrong")], CMD)
+        assert not res.ok
+        assert sw.conns == 2
+
+
+def test_failures_are_per_host(switches):
+    good = [_host(sw) for sw in switches]
+    bad_auth = dataclasses.replace(_host(switches[0], password="wrong"), username="other")
+    refused = Host("127.0.0.1", "admin", PASSWORD, device_type="linux", port=_free_port(), timeout=10)
+    with SshPool(max_workers=4, connect_timeout=5) as pool:
+        results = {r.key: r for r in pool.run(good + [bad_auth, refused], CMD)}
+        assert {r.host for r in results.values()} == {"127.0.0.1"}
+        assert len(results) == 4
+        for sw in switches:
+            r = results[f"admin@127.0.0.1:{sw.port}"]
+            assert r.ok, r.error
+            assert f"uni/tn-{sw.name}-0" in r.output
+        assert not results[f"other@127.0.0.1:{switches[0].port}"].ok
+        assert not results[f"admin@127.0.0.1:{refused.port}"].ok
+        stats = pool.stats()
+        assert stats[f"other@127.0.0.1:{switches[0].port}"]["errors"] == 1
+        assert stats[f"admin@127.0.0.1:{switches[0].port}"]["errors"] == 0
@@ -0,0 +1,30 @@
+import re
+
+from core.apic import condition_filter
+from core.moquery import Condition, build_filter_string
+from core.predicates import compile_condition, compile_conditions
+
+
+def test_in_is_exact_membership_locally():
+    c = Condition("name", "in", "prod, web")
+    test = compile_condition(c)
+    assert test("prod") and test("web")
+    assert not test("prod-web")
+    assert not compile_conditions([c]).match({"name": "prod-web"})
+
+
+def test_in_differs_from_cli_wcard():
+    # CLI: wcard "(prod|web)" alt dizgeleri de eşler; yerel ve REST (or(eq)) eşlemez
+    c = Condition("name", "in", "prod,web")
+    assert build_filter_string("fvTenant", [c]) == 'fvTenant.name*"(prod|web)"'
+    cli = re.compile(re.search(r'"(.*)"', build_filter_string("fvTenant", [c])).group(1))
+    assert cli.search("prod-web")
+    assert not compile_condition(c)("prod-web")
+    assert condition_filter("fvTenant", c) == 'or(eq(fvTenant.name,"prod"),eq(fvTenant.name,"web"))'
+
+
+def test_wcard_ops_search_like_apic():
+    assert compile_condition(Condition("dn", "contains", "tn-a"))("uni/tn-a/ap-b")
+    assert compile_condition(Condition("dn", "startswith", "uni/tn"))("uni/tn-a")
+    assert not compile_condition(Condition("dn", "startswith", "tn"))("uni/tn-a")
+    assert compile_condition(Condition("name", "regex", "^w(eb|ww)$"))("www")